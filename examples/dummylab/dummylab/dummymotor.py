@@ -113,6 +113,10 @@ class Dummymotor(SocketDriverBase):
 
 @Dummymotor.register_motor('dummy')
 class Motor(MotorBase):
+
+    # No instance attribute beyond those of MotorBase (see MotorBase docstring)
+    __slots__ = ()
+
     def __init__(self, name, driver):
         super(Motor, self).__init__(name, driver)
 
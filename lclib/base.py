@@ -13,7 +13,9 @@ import time
 import atexit
 import socket
 import signal
-from select import select
+import sys
+import selectors
+import numpy as np
 
 from . import proxycall, get_config
 from .util import FileDict, Future
@@ -27,24 +29,58 @@ class DeviceException(Exception):
     pass
 
 
-def _recv_all(sock, EOL=b'\n'):
+# SO_BUSY_POLL is not exposed by the socket module (value from linux/asm-generic/socket.h)
+SO_BUSY_POLL = getattr(socket, 'SO_BUSY_POLL', 46 if sys.platform.startswith('linux') else None)
+
+# Size of socket reads (the order of a typical socket receive buffer, so that long
+# replies are read in as few calls as possible)
+RECV_SIZE = 65536
+
+
+def _recv_all(sock, EOL=b'\n', rxbuf=None):
     """
     Receive all data from socket (until EOL)
     * all bytes *
+
+    rxbuf is an optional preallocated bytearray into which the socket
+    is read, to be reused across calls.
     """
-    ret = sock.recv(1024)
-    if not ret:
-        # This happens if the connection was closed at the other end
-        return ret
-    while not ret.endswith(EOL):
+    if rxbuf is None:
+        rxbuf = bytearray(RECV_SIZE)
+    view = memoryview(rxbuf)
+    n = sock.recv_into(view)
+    if not n or rxbuf.endswith(EOL, 0, n):
+        # Empty if the connection was closed at the other end.
+        # Otherwise the common case: the full reply came in one read.
+        return bytes(view[:n])
+    # Accumulate in a bytearray to avoid reallocating at each read
+    buf = bytearray(view[:n])
+    while not buf.endswith(EOL):
         try:
-            ret += sock.recv(1024)
+            n = sock.recv_into(view)
         except TimeoutError:
-            rootlogger.exception(f'EOL not reached after {ret}')
+            rootlogger.exception(f'EOL not reached after {bytes(buf)}')
             raise
-        except:
-            raise
-    return ret
+        if not n:
+            # Connection closed before EOL
+            break
+        buf += view[:n]
+    return bytes(buf)
+
+
+def _send_parts(sock, parts):
+    """
+    Send a list of buffers in a single system call (scatter/gather) where
+    possible, without concatenating them first.
+    """
+    if not hasattr(sock, 'sendmsg'):
+        # Windows
+        sock.sendall(b''.join(parts))
+        return
+    sent = sock.sendmsg(parts)
+    if sent < sum(len(p) for p in parts):
+        # Partial send (unlikely for short commands): send the rest
+        sock.sendall(b''.join(parts)[sent:])
 
 
 class emergency_stop:
@@ -123,6 +159,7 @@ class DriverBase:
         # Periodic calls for logging
         self.periodic_calls = {}
         self.periodic_futures = {}
+        self.stop_periodic = threading.Event()
 
         self.initialized = False
 
@@ -144,12 +181,18 @@ class DriverBase:
         This method runs on a separate thread and calls
         the provided method at a given interval (in seconds)
         """
-        t0 = time.time()
+        # Local bindings for the loop
+        wait = self.stop_periodic.wait
+        monotonic = time.monotonic
+
+        # Monotonic clock: the beat is not affected by system clock adjustments
+        t0 = monotonic()
         n = 0
         while True:
             n += 1
             if not self.initialized:
-                time.sleep(max(0, t0 + n*interval - time.time()))
+                if wait(max(0, t0 + n*interval - monotonic())):
+                    break
                 continue
             try:
                 method()
@@ -160,8 +203,9 @@ class DriverBase:
                 self.logger.exception('Device disconnected.')
                 break
 
-            # Try to keep the beat
-            time.sleep(max(0, t0 + n * interval - time.time()))
+            # Try to keep the beat. Wakes up immediately on shutdown.
+            if wait(max(0, t0 + n * interval - monotonic())):
+                break
 
 
     @proxycall()
@@ -195,7 +239,7 @@ class DriverBase:
         """
         Shutdown procedure registered with atexit.
         """
-        pass
+        self.stop_periodic.set()
 
     @proxycall(admin=True)
     @property
@@ -248,6 +292,10 @@ class SocketDriverBase(DriverBase):
     DEVICE_TIMEOUT = None               # Device socket timeout
     NUM_CONNECTION_RETRY = 2            # Number of times to try to connect
                                         # fdm: it's "tries", not "retries", so it mustn't be set to 0!
+    CONNECTION_RETRY_DELAY = .05        # Delay before the second try, doubled after each failure
+    CONNECTION_TIMEOUT = 1.             # Timeout of each connection attempt
+    BUSY_POLL = None                    # SO_BUSY_POLL time (in microseconds) for the device socket (Linux only).
+                                        # Trades CPU for lower reply latency. None (default) to disable.
     KEEPALIVE_INTERVAL = 10.            # Default Polling (keep-alive) interval
     logger = None
     REPLY_WAIT_TIME = 0.                # Time before reading reply (needed for asynchronous connections)
@@ -275,8 +323,13 @@ class SocketDriverBase(DriverBase):
         self.recv_flag = None
         # Listening/receiving thread
         self.recv_thread = None
+        # Socket pair used to wake up the listening thread (on shutdown or close)
+        self._wake_r = None
+        self._wake_w = None
         # Receiver lock
         self.recv_lock = threading.Lock()
+        # Read buffer, reused for all replies
+        self.rxbuf = bytearray(RECV_SIZE)
 
         # Connect to device
         self.connected = False
@@ -291,58 +344,113 @@ class SocketDriverBase(DriverBase):
         """
         Device connection
         """
-        # Prepare device socket connection
-        self.device_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)  # TCP socket
-        self.device_sock.settimeout(self.DEVICE_TIMEOUT)
-
         for retry_count in range(self.NUM_CONNECTION_RETRY):
+            # Prepare device socket connection. A new socket for each attempt:
+            # a socket that failed to connect cannot be reused.
+            self.device_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)  # TCP socket
+
+            # Short timeout for the connection itself, so that an unreachable device
+            # does not stall each attempt. DEVICE_TIMEOUT applies once connected.
+            self.device_sock.settimeout(self.CONNECTION_TIMEOUT)
+
+            # Commands are short request/reply exchanges: send them immediately (no Nagle),
+            # and let the OS detect dead connections.
+            self.device_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.device_sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
             conn_errno = self.device_sock.connect_ex(self.device_address)
             if conn_errno == 0:
+                self.device_sock.settimeout(self.DEVICE_TIMEOUT)
                 break
 
-            self.logger.critical(os.strerror(conn_errno))
-            time.sleep(.05)
+            self.device_sock.close()
+            self.logger.warning(f'Connection attempt {retry_count + 1} failed: {os.strerror(conn_errno)}')
+
+            # Exponential backoff
+            if retry_count + 1 < self.NUM_CONNECTION_RETRY:
+                time.sleep(min(self.CONNECTION_RETRY_DELAY * 2**retry_count, 5.))
 
         if conn_errno != 0:
             self.logger.critical("Can't connect to device")
             raise DeviceException("Can't connect to device")
 
+        # Acknowledge replies immediately (Linux only)
+        self._quickack()
+
+        # Busy-poll the device for replies if requested (Linux only)
+        if self.BUSY_POLL and SO_BUSY_POLL is not None:
+            try:
+                self.device_sock.setsockopt(socket.SOL_SOCKET, SO_BUSY_POLL, self.BUSY_POLL)
+            except OSError:
+                self.logger.warning('Could not set SO_BUSY_POLL on device socket.')
+
         # Start receiving data
-        self.recv_buffer = b''
+        self.recv_buffer = bytearray()
         self.recv_flag = threading.Event()
         self.recv_flag.clear()
+        self._wake_r, self._wake_w = socket.socketpair()
         self.recv_thread = Future(target=self._listen_recv)
 
         self.connected = True
         self.logger.info(f'Driver {self.name} connected to {self.device_address[0]}:{self.device_address[1]}')
 
+    def _quickack(self):
+        """
+        Enable TCP_QUICKACK on the device socket, where available.
+        """
+        if hasattr(socket, 'TCP_QUICKACK'):
+            try:
+                self.device_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+            except OSError:
+                pass
+
     def _listen_recv(self):
         """
         This threads receives all data in real time and stores it
         in a local buffer. For devices that send data only after
         receiving a command, the buffer is read and emptied immediately.
         """
-        while True:
-            rlist, _, elist = select([self.device_sock], [], [self.device_sock], .5)
-            if elist:
-                self.logger.critical('Exceptional event with device socket.')
-                break
-            if rlist:
+        # The sockets are registered once (epoll on linux) instead of at every select() call.
+        # No timeout: self._wake() unblocks select() when the thread has to stop.
+        wake_r = self._wake_r
+        selector = selectors.DefaultSelector()
+        selector.register(self.device_sock, selectors.EVENT_READ)
+        selector.register(wake_r, selectors.EVENT_READ)
+        try:
+            while not self.shutdown_requested:
+                events = selector.select()
+                if any(key.fileobj is wake_r for key, _ in events):
+                    break
                 # Incoming data
                 with self.recv_lock:
-                    d = _recv_all(rlist[0], EOL=(self.REOL or self.EOL))
+                    try:
+                        d = _recv_all(self.device_sock, EOL=(self.REOL or self.EOL), rxbuf=self.rxbuf)
+                    except OSError:
+                        self.logger.critical('Exceptional event with device socket.')
+                        break
+                    if not d:
+                        # Readable but empty: the device closed the connection
+                        self.logger.critical('Device socket closed.')
+                        self.connected = False
+                        break
                     self.recv_buffer += d
                     self.recv_flag.set()
-            if self.shutdown_requested:
-                break
+                # The kernel resets quickack mode: re-arm it
+                self._quickack()
+        finally:
+            selector.close()
+            wake_r.close()
 
-    def device_cmd(self, cmd: bytes, reply=True) -> bytes:
+    def device_cmd(self, cmd: bytes, reply=True, n_replies=1) -> bytes:
         """
         Send command to the device, NOT adding EOL and return the reply.
 
         Args:
-            cmd: (bytes) pre-formatted command to send.
+            cmd: (bytes) pre-formatted command to send, or a list of buffers
+                 sent together in a single call (e.g. [command, EOL])
             reply: (bool) if False, do not wait for reply (default: True)
+            n_replies: (int) number of replies to wait for, when cmd contains
+                       multiple pipelined commands (default: 1)
 
         Returns:
             reply (bytes) or None
@@ -361,17 +469,29 @@ class SocketDriverBase(DriverBase):
             if isinstance(cmd, str):
                 cmd = cmd.encode()
 
-            self.device_sock.sendall(cmd)
+            if isinstance(cmd, list):
+                _send_parts(self.device_sock, cmd)
+            else:
+                self.device_sock.sendall(cmd)
 
             if reply:
                 # Wait for reply
-                time.sleep(self.REPLY_WAIT_TIME)
+                if self.REPLY_WAIT_TIME:
+                    time.sleep(self.REPLY_WAIT_TIME)
                 if not self.recv_flag.wait(timeout=self.REPLY_TIMEOUT):
                     raise TimeoutError('Device reply timed out.')
 
                 # Concatenate replies
                 response += self.get_recv_buffer()
 
+                # Pipelined commands: wait for the remaining replies
+                if n_replies > 1:
+                    EOL = self.REOL or self.EOL
+                    while response.count(EOL) < n_replies:
+                        if not self.recv_flag.wait(timeout=self.REPLY_TIMEOUT):
+                            raise TimeoutError('Device reply timed out.')
+                        response += self.get_recv_buffer()
+
             else:
                 response = None
         return response
@@ -383,10 +503,10 @@ class SocketDriverBase(DriverBase):
         with self.recv_lock:
 
             # Reply is in the local buffer
-            data = self.recv_buffer
+            data = bytes(self.recv_buffer)
 
-            # Clear the local buffer
-            self.recv_buffer = b''
+            # Clear the local buffer (the listening thread extends it in place)
+            self.recv_buffer.clear()
 
             # Clear flag
             self.recv_flag.clear()
@@ -405,15 +525,28 @@ class SocketDriverBase(DriverBase):
             if not cmd:
                 break
             try:
-                reply = self.device_cmd(cmd.encode() + self.EOL)
-                print(reply)
+                reply = self.device_cmd([cmd.encode(), self.EOL])
+                # Show the reply as text, without the terminator
+                print(reply[:-len(self.REOL or self.EOL)].decode('ascii', errors='replace'))
             except Exception as e:
                 print(repr(e))
 
+    def _wake(self):
+        """
+        Wake up the listening thread so that it exits.
+        """
+        try:
+            self._wake_w.send(b'\0')
+            self._wake_w.close()
+        except (AttributeError, OSError):
+            # Not connected yet, or already woken up
+            pass
+
     def close_device(self):
         """
         Driver clean up on shutdown.
         """
+        self._wake()
         self.device_sock.close()
         self.connected = False
         self.initialized = False
@@ -428,10 +561,12 @@ class SocketDriverBase(DriverBase):
         """
         Clean shutdown of the driver.
         """
+        self.stop_periodic.set()
         if not self.connected:
             return
         # Tell the polling thread to abort. This will ensure that all the rest is wrapped up
         self.shutdown_requested = True
+        self._wake()
         self.logger.info('Shutting down connection to driver.')
 
     def stop(self):
@@ -455,12 +590,22 @@ class MotorBase:
 
     User and dial positions are different and controlled by self.offset and self.scalar
     Dial = (User*scalar)-offset
+
+    MotorBase declares __slots__ to keep motor instances small. Subclasses should
+    declare __slots__ as well, listing any attribute they set (or an empty tuple),
+    otherwise their instances get a __dict__ and the saving is lost.
     """
 
+    # Fixed set of instance attributes (subclasses add their own)
+    __slots__ = ('name', 'driver', 'logger', 'config_file', 'config', '_limcache', '_user_limits')
+
     DEFAULT_CONFIG = data = {'limits': [-1., 1], 
                              'offset': 0.,
                              'scalar': 1.}
 
+    # Configuration changes are written to file at most every CONFIG_SAVE_DELAY seconds
+    CONFIG_SAVE_DELAY = .5
+
     def __init__(self, name, driver):
         # Store motor name and driver instance
         self.name = name
@@ -471,12 +616,17 @@ class MotorBase:
 
         # File name for motor configuration
         self.config_file = os.path.join(get_config()['conf_path'], 'motors', name + '.json')
-        self.config = FileDict(self.config_file)
+        self.config = FileDict(self.config_file, save_delay=self.CONFIG_SAVE_DELAY)
 
         # Make sure all default keys are present
         for k, v in self.DEFAULT_CONFIG.items():
             self.config.setdefault(k, v)
 
+        # Cached (scalar, offset, low, high) for limit checks and cached user limits
+        # - both reset when any of these values changes
+        self._limcache = None
+        self._user_limits = None
+
     def _get_pos(self):
         """
         Return *dial* position in mm or degrees
@@ -507,6 +657,18 @@ class MotorBase:
         """
         return (dial + self.offset)/self.scalar
 
+    def _user_to_dial_vec(self, users):
+        """
+        Converts an array of user positions to dial positions
+        """
+        return np.asarray(users, dtype=float) * self.scalar - self.offset
+
+    def _dial_to_user_vec(self, dials):
+        """
+        Converts an array of dial positions to user positions
+        """
+        return (np.asarray(dials, dtype=float) + self.offset) / self.scalar
+
     def mv(self, x, block=True):
         """
         Absolute move to *user* position x
@@ -514,11 +676,15 @@ class MotorBase:
         Returns final USER position if block=True (default). If block=False, returns
         the thread that will terminate when motion is complete.
         """
-        self._within_limits(x, raise_error=True)
+        # Conversion and limit check with the cached values, dial position computed once
+        s, o, lo, hi = self._limcache or self._make_limcache()
+        target = x * s - o
+        if not lo < target < hi:
+            raise MotorLimitsException(f'{lo} < {target} < {hi}')
         if not block:
-            return Future(self._set_abs_pos, args=(self._user_to_dial(x),))
+            return Future(self._set_abs_pos, args=(target,))
         else:
-            return self._dial_to_user(self._set_abs_pos(self._user_to_dial(x)))
+            return (self._set_abs_pos(target) + o) / s
 
     def mvr(self, x, block=True):
         """
@@ -527,21 +693,29 @@ class MotorBase:
         Returns final USER position if block=True (default). If block=False, returns
         the thread that will terminate when motion is complete.
         """
-        self._within_limits(self.pos + x, raise_error=True)
+        # Check limits in dial units, with a single position read
+        s, o, lo, hi = self._limcache or self._make_limcache()
+        dx = s * x
+        target = self._get_pos() + dx
+        if not lo < target < hi:
+            raise MotorLimitsException(f'{lo} < {target} < {hi}')
         if not block:
-            return Future(self._set_rel_pos, args=[self.scalar * x])
+            return Future(self._set_rel_pos, args=[dx])
         else:
-            return self._dial_to_user(self._set_rel_pos(self.scalar * x))
+            return (self._set_rel_pos(dx) + o) / s
 
     def lm(self):
         """
         Return *user* soft limits
         """
-        # Limits as stored in dialed values. Here they are offset into user values
-        if self.scalar > 0:
-            return self._dial_to_user(self.limits[0]), self._dial_to_user(self.limits[1])
-        else:
-            return self._dial_to_user(self.limits[1]), self._dial_to_user(self.limits[0])
+        if self._user_limits is None:
+            # Limits as stored in dialed values. Here they are offset into user values
+            lo, hi = self.limits
+            if self.scalar > 0:
+                self._user_limits = self._dial_to_user(lo), self._dial_to_user(hi)
+            else:
+                self._user_limits = self._dial_to_user(hi), self._dial_to_user(lo)
+        return self._user_limits
 
     def set_lm(self, low, high):
         """
@@ -551,6 +725,8 @@ class MotorBase:
             raise RuntimeError(f'Low limit ({low}) should be lower than high limit ({high})')
         # Limits are stored in dial values
         self.config['limits'] = sorted([self._user_to_dial(low), self._user_to_dial(high)])
+        self._limcache = None
+        self._user_limits = None
 
     @property
     def pos(self):
@@ -578,6 +754,8 @@ class MotorBase:
     @offset.setter
     def offset(self, value):
         self.config['offset'] = value
+        self._limcache = None
+        self._user_limits = None
         self.logger.warning('You have just changed the offset. The motor limits may need to be manually updated.')
 
     @property
@@ -587,6 +765,8 @@ class MotorBase:
     @scalar.setter
     def scalar(self, value):
         self.config['scalar'] = value
+        self._limcache = None
+        self._user_limits = None
         self.logger.warning('You have just changed the scalar. The motor limits may need to be manually updated.')
 
     def where(self):
@@ -627,8 +807,31 @@ class MotorBase:
         """
         Check if *user* position x is within soft limits.
         """
-        limits = self.limits
-        valid = limits[0] < self._user_to_dial(x) < limits[1]
+        s, o, lo, hi = self._limcache or self._make_limcache()
+        d = x * s - o
+        valid = lo < d < hi
         if raise_error and not valid:
-            raise MotorLimitsException(f'{limits[0]} < {self._user_to_dial(x)} < {limits[1]}')
-        return valid
\ No newline at end of file
+            raise MotorLimitsException(f'{lo} < {d} < {hi}')
+        return valid
+
+    def _within_limits_vec(self, users):
+        """
+        Check if an array of *user* positions is within soft limits.
+        Returns a boolean array.
+        """
+        s, o, lo, hi = self._limcache or self._make_limcache()
+        # In-place operations: no temporary arrays besides the result
+        dials = np.array(users, dtype=float)
+        dials *= s
+        dials -= o
+        valid = lo < dials
+        valid &= dials < hi
+        return valid
+
+    def _make_limcache(self):
+        """
+        Build and store the (scalar, offset, low, high) tuple used for limit checks.
+        """
+        lo, hi = self.limits
+        self._limcache = (self.scalar, self.offset, lo, hi)
+        return self._limcache
\ No newline at end of file
@@ -60,25 +60,127 @@ File naming uses the following recipe:
  filename = CameraBase.BASE_PATH + CameraBase.save_path + file_prefix + [extension]
 
  where:
-  file_prefix is either CameraBase.file_prefix or CameraBase.file_prefix.format(self.counter)
+  file_prefix is either CameraBase.file_prefix or, if it contains format fields,
+  CameraBase.file_prefix.format(self.counter, counter=self.counter)
   extension depends on CameraBase.file_format
 
 This file is part of lab-control-lib
 (c) 2023-2024 Pierre Thibault (pthibault@units.it)
 """
 import os
-import json
 import threading
 from queue import SimpleQueue, Empty
+import numpy as np
 import time
 
 from . import monitor, manager, proxycall, client_or_None
 from .base import DriverBase
-from .util import now, Future, frameconsumer
+from .util import now, Future, frameconsumer, jsonenc
+
+# Python 3.7 compatibility using the backport (pip install shared-memory38)
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    import shared_memory
 
 DEFAULT_FILE_FORMAT = 'hdf5'
+# Accepted file format spellings -> (file format, extension)
+FILE_FORMATS = {'h5': ('hdf5', '.h5'),
+                'hdf': ('hdf5', '.h5'),
+                'hdf5': ('hdf5', '.h5'),
+                'tif': ('tiff', '.tif'),
+                'tiff': ('tiff', '.tif')}
 DEFAULT_BROADCAST_ADDRESS = ('localhost', 5555)
 
+# Clients to monitor and manager, shared by all cameras living in the same process
+_shared_clients = {}
+_shared_clients_lock = threading.Lock()
+
+
+def shared_client(name):
+    """
+    Return the client to the named driver, creating it on first request.
+    """
+    with _shared_clients_lock:
+        if name not in _shared_clients:
+            _shared_clients[name] = client_or_None(name, keep_trying=True)
+        return _shared_clients[name]
+
+
+def format_prefix(prefix, counter):
+    """
+    Insert the counter in the file prefix, either as a positional field
+    (e.g. "snap_{0:04d}") or as the named field "counter" (e.g. "snap_{counter:04d}").
+    Prefixes without format fields are returned as is.
+    """
+    if '{' not in prefix:
+        return prefix
+    try:
+        return prefix.format(counter, counter=counter)
+    except (IndexError, KeyError, ValueError) as e:
+        raise RuntimeError(f'Invalid file prefix "{prefix}": {e!r}')
+
+
+# Shared memory segments attached by read_shared_frame: {name: (generation, segment)}
+_attached_frames = {}
+
+
+def _attach_shm(name):
+    """
+    Attach an existing shared memory segment without registering it with this
+    process's resource tracker. Before python 3.13, an attached segment is
+    tracked as if it were owned, and unlinked when the process exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # python < 3.13
+        pass
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == 'posix':
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except (ImportError, AttributeError):
+            pass
+    return shm
+
+
+def _shm_exists(name):
+    """
+    Check that the shared memory segment has not been unlinked.
+    """
+    if os.path.isdir('/dev/shm'):
+        return os.path.exists(os.path.join('/dev/shm', name.lstrip('/')))
+    try:
+        _attach_shm(name).close()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def read_shared_frame(info):
+    """
+    Read a frame published in shared memory by CameraBase.last_frame_shared.
+
+    The returned array is a view on the shared memory: it is overwritten
+    by the next call to last_frame_shared. Copy it if needed.
+
+    Returns:
+        (frame, meta)
+    """
+    if info['shm'] is None:
+        return None, info['meta']
+    generation, shm = _attached_frames.get(info['shm'], (None, None))
+    if shm is None or generation != info['generation']:
+        # First access, or the camera has recreated the segment
+        if shm is not None:
+            shm.close()
+        shm = _attach_shm(info['shm'])
+        _attached_frames[info['shm']] = (info['generation'], shm)
+    frame = np.ndarray(shape=info['shape'], dtype=info['dtype'], buffer=shm.buf)
+    return frame, info['meta']
+
 
 # No @proxydriver because this class is not meant to be instantiated
 class CameraBase(DriverBase):
@@ -98,6 +200,7 @@ class CameraBase(DriverBase):
                             'file_format': DEFAULT_FILE_FORMAT,
                             'file_prefix': "snap_{0:04d}",
                             'do_broadcast': True,
+                            'broadcast_compression': False,
                             'magnification': 1.,
                             'counter': 0,
                             'save_mode': 'append',
@@ -106,7 +209,17 @@ class CameraBase(DriverBase):
                             'operation_mode': None,
                             'exposure_time': 1.,
                             'exposure_number': 1,
-                            'accumulation_number': 1}
+                            'accumulation_number': 1,
+                            'chunk_shape': None,
+                            'compression': 'gzip',
+                            'shuffle': True,
+                            'direct_chunk_write': False,
+                            'quantize_bits': None,
+                            'quantize_shift': 0,
+                            'quantize_offset': 0,
+                            'core_driver': False,
+                            'metadata_format': 'h5',
+                            'metadata_sidecar': False}
 
     # python >3.9
     # DEFAULT_CONFIG = (DriverBase.DEFAULT_CONFIG | LOCAL_DEFAULT_CONFIG)
@@ -125,10 +238,10 @@ class CameraBase(DriverBase):
             self.broadcast_address = broadcast_address
 
         # Clients to monitor and manager
-        self.monitor = client_or_None('monitor', keep_trying=True)
+        self.monitor = shared_client('monitor')
 
         # TODO: in the future, we should be able to swap managers
-        self.manager = client_or_None('manager', keep_trying=True)
+        self.manager = shared_client('manager')
 
         self.store_future = None      # Will be replaced with a future when starting to store.
         self._stop_roll = False       # To interrupt rolling
@@ -143,6 +256,8 @@ class CameraBase(DriverBase):
         self.tags = None
         self.end_acquisition = False
         self._scan_path = None
+        self._file_ext = FILE_FORMATS.get(self.config['file_format'], (None, None))[1]
+        self._save_dirs = {}          # Cache of full save directories (with trailing separator)
         self.abort_flag = threading.Event()
 
         self.enqueue_lock = threading.Lock()
@@ -169,9 +284,15 @@ class CameraBase(DriverBase):
         self.frame_future = Future(self.frame_management_loop)
 
         self._last_frame = (None, None)
+        self._frame_shm = None
+        self._frame_shm_generation = 0
+
+        # Cache for psize, reset when binning or operation mode change
+        self._psize_cache = None
 
         # Broadcasting process
-        self.frame_streamer = frameconsumer.FrameStreamer(self.broadcast_address[1])
+        self.frame_streamer = frameconsumer.FrameStreamer(self.broadcast_address[1],
+                                                          compress=self.config['broadcast_compression'])
         if self.config['do_broadcast']:
             self.frame_streamer.on()
 
@@ -295,12 +416,11 @@ class CameraBase(DriverBase):
         self.abort_flag.clear()
         while True:
 
-            # Wait for the next trigger
-            if not self.do_acquire.wait(.2):
-                if self.end_acquisition:
-                    self.logger.debug('end_acquisition is True. Breaking out.')
-                    break
-                continue
+            # Wait for the next trigger (disarm also sets the flag to wake us up)
+            self.do_acquire.wait()
+            if self.end_acquisition:
+                self.logger.debug('end_acquisition is True. Breaking out.')
+                break
             filename = self.filename
             self.do_acquire.clear()
             self.logger.debug('Received acquisition request (do_acquire flag).')
@@ -308,7 +428,19 @@ class CameraBase(DriverBase):
             # Prepare next acquisition on the file writing process
             if not self.rolling:
                 self.logger.debug('Requesting opening to file writer.')
-                self.frame_writer.open(filename=filename)
+                config = self.config
+                self.frame_writer.open(filename=filename,
+                                       n_frames=self.exposure_number,
+                                       chunk_shape=config['chunk_shape'],
+                                       compression=config['compression'],
+                                       shuffle=config['shuffle'],
+                                       direct_chunk_write=config['direct_chunk_write'],
+                                       quantize_bits=config['quantize_bits'],
+                                       quantize_shift=config['quantize_shift'],
+                                       quantize_offset=config['quantize_offset'],
+                                       core_driver=config['core_driver'],
+                                       metadata_format=config['metadata_format'],
+                                       metadata_sidecar=config['metadata_sidecar'])
                 self.print(f'{self.name} will save to {filename}')
 
             # trigger acquisition with subclassed method and wait until it is done
@@ -380,8 +512,11 @@ class CameraBase(DriverBase):
             self.grab_metadata.clear()
             self.logger.debug('Metadata collection requested (grab_metadata flag)')
 
-            # Request global metadata (exclude self, we do that locally instead)
-            if not self.monitor.connected:
+            # Frames are saved only when not rolling. If they are not broadcast either, skip
+            # the global metadata request. Local metadata is still collected for _last_frame.
+            if self.rolling and not self.config['do_broadcast']:
+                self.logger.debug('Frames are neither saved nor broadcast. Skipping global metadata request.')
+            elif not self.monitor.connected:
                 self.logger.error("Not connected to monitor! Cannot request metadata!")
             else:
                 self.monitor.request_meta(request_ID=self.name, exclude_list=[self.name])
@@ -439,6 +574,54 @@ class CameraBase(DriverBase):
     def last_frame(self):
         return self._last_frame
 
+    @proxycall()
+    def last_frame_shared(self):
+        """
+        Copy the last frame to shared memory and return a description
+        to be passed to read_shared_frame. For clients on the same host,
+        this avoids sending the frame through the proxy.
+        """
+        frame, meta = self._last_frame
+        if frame is None:
+            return {'shm': None, 'meta': meta}
+        frame = np.asarray(frame)
+        shm = self._frame_shm
+        if shm is None or shm.size < frame.nbytes or not _shm_exists(shm.name):
+            # Create the segment, or recreate it if it is too small or was unlinked
+            self._close_frame_shm()
+            name = f'{self.name}_frame'
+            try:
+                shm = shared_memory.SharedMemory(name=name, create=True, size=frame.nbytes)
+            except FileExistsError:
+                # Left over by a previous instance
+                old = shared_memory.SharedMemory(name=name)
+                old.close()
+                old.unlink()
+                shm = shared_memory.SharedMemory(name=name, create=True, size=frame.nbytes)
+            self._frame_shm = shm
+            self._frame_shm_generation += 1
+        np.ndarray(shape=frame.shape, dtype=frame.dtype, buffer=shm.buf)[:] = frame
+        return {'shm': shm.name,
+                'generation': self._frame_shm_generation,
+                'shape': frame.shape,
+                'dtype': str(frame.dtype),
+                'nbytes': frame.nbytes,
+                'meta': meta}
+
+    def _close_frame_shm(self):
+        """
+        Release the shared memory used by last_frame_shared.
+        """
+        if self._frame_shm is None:
+            return
+        self._frame_shm.close()
+        try:
+            self._frame_shm.unlink()
+        except FileNotFoundError:
+            # Already removed
+            pass
+        self._frame_shm = None
+
     @proxycall()
     def get_meta(self, metakeys=None):
         """
@@ -453,10 +636,12 @@ class CameraBase(DriverBase):
             scan_path = self.manager.scan_path
             scan_counter = self.manager.get_counter() if scan_path else None
 
+        # Pixel size is read once: epsize would query it again.
+        psize = self.psize
         meta = {'detector': self.name,
                 'scan_name': scan_name,
-                'psize': self.psize,
-                'epsize': self.epsize,
+                'psize': psize,
+                'epsize': psize / self.magnification,
                 'exposure_time': self.exposure_time,
                 'exposure_number': self.exposure_number,
                 'operation_mode': self.operation_mode,
@@ -502,22 +687,18 @@ class CameraBase(DriverBase):
         Build the full file name to save to.
         """
 
-        # Try to replace counter of prefix is a format string.
-        try:
-            prefix = prefix.format(self.counter)
-        except NameError:
-            pass
-
-        full_file_prefix = os.path.join(self.BASE_PATH, path, prefix)
+        # Replace counter if prefix is a format string. Static prefixes are used as is.
+        prefix = format_prefix(prefix, self.counter)
 
-        # Add extension based on file format
-        if self.file_format == 'hdf5':
-            filename = full_file_prefix + '.h5'
-        elif self.file_format == 'tiff':
-            filename = full_file_prefix + '.tif'
-        else:
+        # Add extension based on file format (cached by the file_format setter)
+        if self._file_ext is None:
             raise RuntimeError(f'Unknown file format: {self.file_format}.')
-        return filename
+        try:
+            save_dir = self._save_dirs[path]
+        except KeyError:
+            save_dir = os.path.join(self.BASE_PATH, path, '')
+            self._save_dirs[path] = save_dir
+        return save_dir + prefix + self._file_ext
 
 
     @proxycall(admin=True)
@@ -588,6 +769,7 @@ class CameraBase(DriverBase):
 
         # Terminate acquisition loop and wait for it to complete
         self.end_acquisition = True
+        self.do_acquire.set()
 
         try:
             self.loop_future.join()
@@ -695,7 +877,7 @@ class CameraBase(DriverBase):
                     'file_prefix': self.file_prefix,
                     'save_path': self.save_path,
                     'magnification': self.magnification}
-        return json.dumps(settings)
+        return jsonenc.dumps(settings)
 
     @proxycall()
     def set_log_level(self, level):
@@ -711,6 +893,7 @@ class CameraBase(DriverBase):
         self.roll_off()
         # Stop metadata loop
         self.closing = True
+        self._close_frame_shm()
 
     #
     # GETTERS / SETTERS TO IMPLEMENT IN SUBCLASSES
@@ -760,6 +943,7 @@ class CameraBase(DriverBase):
         Set operation mode
         """
         value = value or {}
+        self._psize_cache = None
         self.set_operation_mode(**value)
 
     def _get_binning(self):
@@ -777,6 +961,10 @@ class CameraBase(DriverBase):
     def _get_psize(self):
         """
         Return pixel size in mm, taking into account binning.
+
+        The value is cached by psize and the cache is cleared by the binning and
+        operation_mode setters. Subclasses that can change the pixel size in any
+        other way must set self._psize_cache = None when they do.
         """
         raise NotImplementedError
 
@@ -807,12 +995,11 @@ class CameraBase(DriverBase):
 
     @file_format.setter
     def file_format(self, value):
-        if value.lower() in ['h5', 'hdf', 'hdf5']:
-            self.config['file_format'] = 'hdf5'
-        elif value.lower() in ['tif', 'tiff']:
-            self.config['file_format'] = 'tiff'
-        else:
+        try:
+            file_format, self._file_ext = FILE_FORMATS[value.lower()]
+        except KeyError:
             raise RuntimeError(f'Unknown file format: {value}')
+        self.config['file_format'] = file_format
 
     @proxycall(admin=True)
     @property
@@ -824,6 +1011,8 @@ class CameraBase(DriverBase):
 
     @file_prefix.setter
     def file_prefix(self, value):
+        # Fail now rather than at the next acquisition
+        format_prefix(value, 0)
         self.config['file_prefix'] = value
 
     @proxycall(admin=True)
@@ -877,6 +1066,7 @@ class CameraBase(DriverBase):
 
     @operation_mode.setter
     def operation_mode(self, value):
+        self._psize_cache = None
         self._set_operation_mode(value)
 
     @proxycall(admin=True)
@@ -930,15 +1120,18 @@ class CameraBase(DriverBase):
 
     @binning.setter
     def binning(self, value):
+        self._psize_cache = None
         self._set_binning(value)
 
     @proxycall()
     @property
     def psize(self):
         """
-        Pixel size in um (taking into account binning)
+        Pixel size in um (taking into account binning). Cached, see _get_psize.
         """
-        return self._get_psize()
+        if self._psize_cache is None:
+            self._psize_cache = self._get_psize()
+        return self._psize_cache
 
     @proxycall()
     @property
@@ -27,6 +27,7 @@ This file is part of labcontrol
 """
 
 import time
+from functools import lru_cache
 
 from .. import proxycall, proxydevice
 from ..base import MotorBase, SocketDriverBase, emergency_stop
@@ -36,6 +37,32 @@ __all__ = ['SmaractBase', 'SmaractMotor']
 
 EOL = b'\n'
 
+# Prefix of all replies
+REPLY_PREFIX = b':'
+
+# Prefix of all queries (commands that do not change the device state)
+QUERY_PREFIX = b':G'
+
+# Fixed commands, pre-encoded
+CMD_STOP = b':S' + EOL
+CMD_KEEPALIVE = b':GS0' + EOL
+CMD_GET_SENSOR_MODE = b':GSE' + EOL
+
+
+@lru_cache(maxsize=64)
+def channel_cmd(cmd, channel):
+    """
+    Encoded query for the given channel, e.g. channel_cmd(':GP', 0) -> b':GP0\\n'
+    """
+    return f'{cmd}{channel}'.encode() + EOL
+
+
+# Channel status codes (reply to :GS) for which the positioner is not moving
+STATUS_STOPPED = 0        # target reached
+STATUS_HOLDING = 3        # holding voltage is on --> target reached
+STATUS_HARD_LIMIT = 9     # movement reached hard limit
+IDLE_STATUS = frozenset((STATUS_STOPPED, STATUS_HOLDING, STATUS_HARD_LIMIT))
+
 @proxydevice()
 class SmaractBase(SocketDriverBase):
     """
@@ -47,11 +74,15 @@ class SmaractBase(SocketDriverBase):
     DEFAULT_SPEED = 1000  # um/s
     DEFAULT_ACCEL = 10000  # um/s^2 (!)
     SENSOR_MODES = {0: 'disabled', 1: 'enabled', 2: 'power save'}
+    SETTINGS_CACHE_TTL = .5  # seconds during which speed, acceleration and limit readings are reused
     EOL = EOL
 
     def __init__(self, device_address=None):
         if device_address is None:
             device_address = self.DEFAULT_DEVICE_ADDRESS
+        # Cache for settings queries: {cmd: (time, reply)}. Cleared by any non-query command.
+        self._settings_cache = {}
+
         super().__init__(device_address=device_address)
 
         self.metacalls.update({'position': lambda: [self.get_pos(0), self.get_pos(1), self.get_pos(2)],
@@ -78,7 +109,7 @@ class SmaractBase(SocketDriverBase):
         """
         Keep-alive call
         """
-        r = self.send_cmd(':GS0')
+        r = self.send_cmd(CMD_KEEPALIVE)
         if not r:
             raise RuntimeError('Device is not responding.')
 
@@ -86,19 +117,68 @@ class SmaractBase(SocketDriverBase):
         """
         Send command to Smaract device.
         Args:
-            cmd (str): Command to send (without EOL)
+            cmd (str or bytes): Command to send (without EOL), or pre-encoded
+                                command (with EOL) for repeated calls.
 
         Returns: (code, values)
         """
-        # Convert to bytes
         if isinstance(cmd, str):
             cmd = cmd.encode()
-        cmd += self.EOL
+            # Command and EOL are sent together without concatenation
+            send = [cmd, self.EOL]
+        else:
+            send = cmd
+        if not cmd.startswith(QUERY_PREFIX):
+            # Settings may have changed
+            self._settings_cache.clear()
+        s = self.device_cmd(send)
 
-        s = self.device_cmd(cmd)
+        # Remove trailing '\n'
+        return self._parse_reply(s[:-1])
+
+    def send_cmds(self, *cmds):
+        """
+        Send multiple commands to Smaract device at once, saving round trips.
+        Args:
+            cmds (str or bytes): Commands to send (str without EOL, or
+                                 pre-encoded bytes with EOL)
 
-        # Remove ':' prefix and trailing '\n'
-        s = s[1:-1].decode('ascii', errors='ignore')
+        Returns: list of (code, values), one for each command.
+        """
+        parts = []
+        for c in cmds:
+            if isinstance(c, str):
+                parts += [c.encode(), self.EOL]
+            else:
+                parts.append(c)
+        self._settings_cache.clear()
+        s = self.device_cmd(parts, n_replies=len(cmds))
+        return [self._parse_reply(r) for r in s.split(self.EOL)[-len(cmds)-1:-1]]
+
+    def _query_setting(self, cmd):
+        """
+        Send a settings query (pre-encoded), reusing a reply younger than SETTINGS_CACHE_TTL.
+        Returns: (code, values)
+        """
+        t = time.monotonic()
+        cached = self._settings_cache.get(cmd)
+        if cached is not None and t - cached[0] < self.SETTINGS_CACHE_TTL:
+            return cached[1]
+        reply = self.send_cmd(cmd)
+        self._settings_cache[cmd] = (t, reply)
+        return reply
+
+    @staticmethod
+    def _parse_reply(s):
+        """
+        Parse one reply (without EOL) into (code, values).
+        """
+        # All replies start with ':'
+        if s[:1] != REPLY_PREFIX:
+            raise RuntimeError(f'Unexpected reply from device: {s!r}')
+
+        # Remove ':' prefix
+        s = s[1:].decode('ascii', errors='ignore')
 
         # Split commas
         sl = s.split(',')
@@ -145,21 +225,19 @@ class SmaractBase(SocketDriverBase):
         Emergency stop.
         """
         self.logger.info("ABORTING MOTION!")
-        return self.send_cmd(':S')
+        return self.send_cmd(CMD_STOP)
 
     @proxycall()
     def check_done(self, channel):
         """
         Poll until movement is complete.
         """
+        cmd = channel_cmd(':GS', channel)
         with emergency_stop(self.abort):
             while True:
-                code, f = self.send_cmd(f':GS{channel}')
-                if int(f[1]) in [0, 3, 9]:
-                    # motor is not moving:
-                    # 0 - stopped --> target reached
-                    # 3 - holding voltage is on --> target reached
-                    # 9 - movement reached hard limit
+                code, f = self.send_cmd(cmd)
+                if f[1] in IDLE_STATUS:
+                    # motor is not moving
                     break
                 # Temporise
                 time.sleep(self.POLL_INTERVAL)
@@ -179,7 +257,7 @@ class SmaractBase(SocketDriverBase):
         self.check_channel(channel)
 
         # Get speed
-        code, v = self.send_cmd(f':GCLS{channel}')  # "Get Closed Loop Speed"
+        code, v = self._query_setting(channel_cmd(':GCLS', channel))  # "Get Closed Loop Speed"
 
         if int(v[1]) == 0:
             raise RuntimeError('Closed loop speed control is deactivated')
@@ -253,7 +331,7 @@ class SmaractBase(SocketDriverBase):
         self.check_channel(channel)
 
         # Read accel value
-        code, a = self.send_cmd(f':GCLA{channel}')  # Get Closed Loop Acceleration
+        code, a = self._query_setting(channel_cmd(':GCLA', channel))  # Get Closed Loop Acceleration
         accel_um_s2 = float(a[1])
         self.logger.debug(f'Current acceleration on channel {channel} is {accel_um_s2} um/s^2')
 
@@ -321,7 +399,7 @@ class SmaractBase(SocketDriverBase):
         the move.
         """
         # get the mode
-        code, m = self.send_cmd(':GSE')
+        code, m = self.send_cmd(CMD_GET_SENSOR_MODE)
 
         m = int(m[0])
         if m not in list(self.SENSOR_MODES.keys()):
@@ -355,7 +433,7 @@ class SmaractBase(SocketDriverBase):
         self.check_channel(channel)
 
         # get limits
-        code, l0 = self.send_cmd(f':GPL{channel}')
+        code, l0 = self._query_setting(channel_cmd(':GPL', channel))
 
         # TODO: CONFIRM THAT THE LIMITS ARE INDEED l0[1] and l0[2]
 
@@ -375,7 +453,7 @@ class SmaractBase(SocketDriverBase):
         self.check_channel(channel)
 
         # get position
-        code, p = self.send_cmd(f':GP{channel}')
+        code, p = self.send_cmd(channel_cmd(':GP', channel))
 
         return float(p[1])*1e-3
 
@@ -389,9 +467,12 @@ class SmaractBase(SocketDriverBase):
 
         # move
         pos_abs_nm = int(pos_abs_um*1000)
-        self.send_cmd(f':MPA{channel:d},{pos_abs_nm:d},60000')
 
-        self.check_done(channel)
+        # Send the motion command and the first status query together
+        _, (code, f) = self.send_cmds(b':MPA%d,%d,60000\n' % (channel, pos_abs_nm), channel_cmd(':GS', channel))
+
+        if f[1] not in IDLE_STATUS:
+            self.check_done(channel)
 
         # read motor position after move
         return self.get_pos(channel)
@@ -402,7 +483,17 @@ class SmaractBase(SocketDriverBase):
         Move stage relative, in um.
         Returns end position.
         """
-        return self.move_abs(channel, self.get_pos(channel) + pos_rel_um)
+        self.check_channel(channel)
+
+        # Relative move on the controller: no need to read the position first
+        pos_rel_nm = int(pos_rel_um*1000)
+        _, (code, f) = self.send_cmds(b':MPR%d,%d,60000\n' % (channel, pos_rel_nm), channel_cmd(':GS', channel))
+
+        if f[1] not in IDLE_STATUS:
+            self.check_done(channel)
+
+        # read motor position after move
+        return self.get_pos(channel)
 
     @proxycall(admin=True, block=False)
     def find_referencemark(self, channel):
@@ -424,6 +515,9 @@ class SmaractBase(SocketDriverBase):
 
 
 class SmaractMotor(MotorBase):
+
+    __slots__ = ('axis',)
+
     def __init__(self, name, driver, axis):
         """
         SmarAct Motor. axis is the driver's channel
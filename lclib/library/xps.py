@@ -33,6 +33,10 @@ from ..util import Future
 __all__ = ['XPSBase', 'XPSMotor']
 
 EOL = b',EndOfAPI'
+CMD_END = EOL + b'\n'
+
+# Fixed commands, pre-encoded
+CMD_CONTROLLER_STATUS = b'ControllerStatusGet(int *)' + CMD_END
 
 
 @proxydevice()
@@ -42,6 +46,7 @@ class XPSBase(SocketDriverBase):
     """
     EOL = EOL
     POLL_INTERVAL = 0.05     # temporization for rapid status checks during moves.
+    STATUS_MAX_AGE = 0.04    # motion status younger than this is not queried again.
 
 
     def __init__(self, name, axis, device_address=None):
@@ -50,6 +55,14 @@ class XPSBase(SocketDriverBase):
         self.name = name
         device_address = device_address or self.DEFAULT_DEVICE_ADDRESS
 
+        # Last motion status and the time it was read (see motion_status)
+        self._motion_status = (0., None)
+
+        # Pre-encoded polling commands
+        self._cmd_motion_status = f'GroupMotionStatusGet({self.group}, int *)'.encode() + CMD_END
+        self._cmd_get_pos = f'GroupPositionCurrentGet({self.axis}, double *)'.encode() + CMD_END
+        self._cmd_group_status = f'GroupStatusGet({self.group}, int *)'.encode() + CMD_END
+
         # A second light-weight connection used for motion (blocking)
         self.motion = XPSMotion(device_address=device_address, axis=self.axis)
 
@@ -60,7 +73,7 @@ class XPSBase(SocketDriverBase):
 
         # Start periodic calls to keep the connection alive
         self.periodic_calls.update({'position': (self.get_pos, 20),
-                                    'status' : (self.motion.get_pos, 20)})
+                                    'status' : (self.motion.keep_alive, 20)})
         self.start_periodic_calls()
 
     def init_device(self):
@@ -74,31 +87,26 @@ class XPSBase(SocketDriverBase):
 
     def send_cmd(self, cmd, parse_error=True):
         """
-        Send command and parse reply
+        Send command (str, or pre-encoded bytes including CMD_END) and parse reply
         """
-        # Convert to bytes
-        if isinstance(cmd, str):
-            cmd = cmd.encode()
-
         self.logger.debug(f'Sending command: {cmd}')
 
-        cmd += self.EOL + b'\n'
-
+        if isinstance(cmd, str):
+            # Command and terminator are sent together without concatenation
+            cmd = [cmd.encode(), CMD_END]
         s = self.device_cmd(cmd)
 
-        # Remove trailing EOL
-        s = s[:-9].decode('ascii', errors='ignore')
-
-        # Check if there are commas in the strings, then strip the values
-        sl = s.split(',')
+        # Remove trailing EOL and split out the error code and first value only.
+        # int() parses bytes directly, only the returned value is decoded.
+        sl = s[:-len(EOL)].split(b',', 2)
 
         code = int(sl[0])
 
         if not parse_error:
-            return code, sl[1]
+            return code, sl[1].decode('ascii', errors='ignore')
 
         if code == 0:
-            return sl[1]
+            return sl[1].decode('ascii', errors='ignore')
         elif code == -108:
             raise RuntimeError('TCP/IP connection closed by an administrator')
         else:
@@ -110,14 +118,14 @@ class XPSBase(SocketDriverBase):
         """
         Controller status
         """
-        self.send_cmd('ControllerStatusGet(int *)')
+        self.send_cmd(CMD_CONTROLLER_STATUS)
 
     @proxycall()
     def group_status(self):
         """
         Group status
         """
-        self.send_cmd(f'GroupStatusGet({self.group}, int *)')
+        self.send_cmd(self._cmd_group_status)
         
     def get_error_string(self, error_code):
         """
@@ -144,6 +152,7 @@ class XPSBase(SocketDriverBase):
         """
         Kill group
         """
+        self._motion_status = (0., None)
         return self.send_cmd(f'GroupKill({self.group})')
 
     @proxycall(admin=True)
@@ -151,6 +160,7 @@ class XPSBase(SocketDriverBase):
         """
         Initialize group (no encoder reset)
         """
+        self._motion_status = (0., None)
         return self.send_cmd(f'GroupInitializeNoEncoderReset({self.group})')
 
     @proxycall()
@@ -158,7 +168,7 @@ class XPSBase(SocketDriverBase):
         """
         Get position of the group.
         """
-        reply = self.send_cmd(f'GroupPositionCurrentGet({self.axis}, double *)')
+        reply = self.send_cmd(self._cmd_get_pos)
         return float(reply)
 
     @proxycall(admin=True)
@@ -168,25 +178,50 @@ class XPSBase(SocketDriverBase):
         If pos is None, return to current positions.
         """
         pos = pos or self.get_pos()
+        self._motion_status = (0., None)
         return self.send_cmd(f'GroupHomeSearchAndRelativeMove({self.group}, {pos})')
 
     @proxycall(admin=True, block=False)
-    def move_abs(self, pos):
+    def move_abs(self, pos, poll=False):
         """
         Move to requested position (mm)
+
+        The motion command on the second connection returns when the
+        motion is complete, so we just wait for it. If poll is True,
+        poll the motion status instead (see check_done).
         """
+        self._motion_status = (0., None)
         future = Future(self.motion.move_abs, args=(pos,))
-        self.check_done()
-        return future.result()
+        return self._wait_motion(future, poll)
 
     @proxycall(admin=True, block=False)
-    def move_rel(self, disp):
+    def move_rel(self, disp, poll=False):
         """
         Move by requested displacement disp (mm)
+
+        See move_abs for the meaning of poll.
         """
+        self._motion_status = (0., None)
         future = Future(self.motion.move_rel, args=(disp,))
-        self.check_done()
-        return future.result()
+        return self._wait_motion(future, poll)
+
+    def _wait_motion(self, future, poll):
+        """
+        Wait for the motion command running in future to complete.
+        """
+        if poll:
+            self.check_done()
+            return future.result()
+        with emergency_stop(self.abort):
+            while True:
+                # Wait with a timeout so that interruptions are handled
+                try:
+                    result = future.result(timeout=self.POLL_INTERVAL * 10)
+                    break
+                except TimeoutError:
+                    continue
+        self.logger.debug("Finished moving stage.")
+        return result
 
     @proxycall(admin=True)
     def check_done(self):
@@ -209,6 +244,7 @@ class XPSBase(SocketDriverBase):
         Abort call
         """
         print('Calling motion abort')
+        self._motion_status = (0., None)
         try:
             self.send_cmd(f'GroupMoveAbort({self.group})')
         except RuntimeError:
@@ -221,8 +257,17 @@ class XPSBase(SocketDriverBase):
         Get current motion status
         0: not moving
         1: moving
+
+        A status read less than STATUS_MAX_AGE seconds ago is returned without
+        querying the controller, so that concurrent pollers share queries.
         """
-        return int(self.send_cmd(f'GroupMotionStatusGet({self.group}, int *)'))
+        t, status = self._motion_status
+        now = time.monotonic()
+        if now - t < self.STATUS_MAX_AGE:
+            return status
+        status = int(self.send_cmd(self._cmd_motion_status))
+        self._motion_status = (now, status)
+        return status
 
 
 class XPSMotion(SocketDriverBase):
@@ -235,6 +280,10 @@ class XPSMotion(SocketDriverBase):
     def __init__(self, device_address, axis):
         self.axis = axis
         device_address = device_address or self.DEFAULT_DEVICE_ADDRESS
+
+        # Pre-encoded keep-alive / position query
+        self._cmd_get_pos = f'GroupPositionCurrentGet({self.axis}, double *)'.encode() + CMD_END
+
         super().__init__(device_address=device_address)
 
     # Borrow methods defined above...
@@ -252,9 +301,18 @@ class XPSMotion(SocketDriverBase):
         """
         Get position of the group.
         """
-        reply = self.send_cmd(f'GroupPositionCurrentGet({self.axis}, double *)')
+        reply = self.send_cmd(self._cmd_get_pos)
         return float(reply)
 
+    def keep_alive(self):
+        """
+        Keep-alive call. Skipped while a motion command is running: the
+        connection is in use, and the call would only queue behind the move.
+        """
+        if self.cmd_lock.locked():
+            return
+        self.get_pos()
+
     def move_rel(self, disp):
         """
         Move by requested displacement disp (mm). This call blocks until done or
@@ -271,6 +329,8 @@ class XPSMotion(SocketDriverBase):
 
 class XPSMotor(MotorBase):
 
+    __slots__ = ()
+
     def __init__(self, name, driver):  # removed axis parameter
         """
         Newport Motor. axis is the driver's channel
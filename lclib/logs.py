@@ -8,6 +8,8 @@ This file is part of lab-control-lib
 import logging
 import logging.config
 import logging.handlers
+import atexit
+import queue
 import zmq
 import json
 import threading
@@ -107,7 +109,15 @@ def log_to_file(log_file_name):
                                                         encoding='utf-8')
     file_handler.setFormatter(dual_formatter)
     file_handler.setLevel(logging.DEBUG)
-    logger.addHandler(file_handler)
+
+    # File writes happen on a listener thread: logging calls only enqueue the record.
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setLevel(logging.DEBUG)
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(queue_handler)
 
 # Tell matplotlib to shut up even on debug mode
 matplotlib_logger = logging.getLogger('matplotlib')
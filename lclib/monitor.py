@@ -50,7 +50,11 @@ class MonitorBase(DriverBase):
     The Monitor subclass can be augmented with custom methods decorated with `proxycall`.
     """
 
+    LOCAL_DEFAULT_CONFIG = {'meta_timeout': .5}   # Maximum wait (in seconds) for pending metadata in return_meta
+
+    # python <3.9
     DEFAULT_CONFIG = DriverBase.DEFAULT_CONFIG.copy()
+    DEFAULT_CONFIG.update(LOCAL_DEFAULT_CONFIG)
 
     def __init__(self):
         """
@@ -139,6 +143,7 @@ class MonitorBase(DriverBase):
     def return_meta(self, request_ID=None):
         """
         Return the metadata that has been accumulated since the last call to request_meta.
+        Collections still running are given (all together) up to config['meta_timeout'] seconds to complete.
 
         Args:
             request_ID: The ID of the request made.
@@ -157,7 +162,9 @@ class MonitorBase(DriverBase):
         # Grab all available metadata
         meta = {}
         times = {}
+        deadline = time.time() + self.config['meta_timeout']
         for name, future in request.items():
+            future.join(timeout=max(0., deadline - time.time()))
             if not future.done():
                 self.logger.warning(f'{name}: metadata collection not completed in time.')
             else:
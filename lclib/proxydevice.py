@@ -206,7 +206,7 @@ class WrapServiceBase(rpyc.Service):
                     )
 
                 # Find the method to call in the object instance
-                instance_method = getattr(service_self.server.instance, name)
+                instance_method = service_self.server.methods[name]
 
                 # Call the instance method
                 with service_self.server.lock:
@@ -223,7 +223,7 @@ class WrapServiceBase(rpyc.Service):
                     )
 
                 # Find the method to call in the object instance
-                instance_method = getattr(service_self.server.instance, name)
+                instance_method = service_self.server.methods[name]
 
                 # Check if another non-blocking call is already running
                 if service_self.server.awaiting_result is not None:
@@ -352,9 +352,9 @@ class ProxyClientBase:
     ADDRESS = None
     API = None
 
-    SERVE_INTERVAL = 0.0
-    SLEEP_INTERVAL = 0.1
-    RECONNECT_INTERVAL = 3.0
+    SERVE_INTERVAL = 1.0   # Maximum wait for incoming data before checking for termination
+    RECONNECT_INTERVAL = 3.0       # Delay before the first reconnection attempt, doubled after each failure
+    RECONNECT_MAX_INTERVAL = 30.0  # Maximum delay between reconnection attempts
 
     def __init__(self, admin=True, name=None, args=None, kwargs=None, clean=True, reconnect='if_successful'):
         """
@@ -375,6 +375,7 @@ class ProxyClientBase:
         self.client_name = name or self.name
         self.clean = clean
         self.reconnect = reconnect
+        self.request_admin = admin
 
         # Statistics
         self.stats = {'startup': time.time(),
@@ -390,6 +391,7 @@ class ProxyClientBase:
 
         # rpyc connection
         self.conn = None
+        self._remote_methods = {}
         self.serving_thread = None
         self._connection_failed = False
         self.first_connect = True
@@ -409,8 +411,9 @@ class ProxyClientBase:
                 raise RuntimeError(f'Client {name} is not connected, so cannot instantiate remote instance' )
             self.conn.root.create_instance(args, kwargs)
 
-        # Ask for admin
-        if self._connected:
+        # Ask for admin. With reconnect='always', the connection is established
+        # in the background and admin is requested by the serving thread instead.
+        if self._connected and self.reconnect != 'always':
             self.conn.root.ask_admin(admin=admin)
 
         # For thread clean up
@@ -473,10 +476,11 @@ class ProxyClientBase:
         All exceptions have to be caught because this is running on a separate thread.
         """
         # Wrap everything in a loop for reconnect.
+        reconnect_delay = self.RECONNECT_INTERVAL
         while not self._terminate:
             try:
                 # rpyc connection
-                self.conn = rpyc.connect(
+                conn = rpyc.connect(
                     service=self._create_service(),
                     host=self.ADDRESS[0],
                     port=self.ADDRESS[1],
@@ -487,15 +491,32 @@ class ProxyClientBase:
                     self.logger.error(f"Connection to {self.ADDRESS} refused. Is the server running?")
                     raise
 
-                # Try reconnecting
-                if self.first_connect:
-                    self.logger.info(f"Connection for {self.name} to {self.ADDRESS} not yet established. Retrying...")
-                else:
-                    self.logger.info(f"Connection for {self.name} to {self.ADDRESS} is lost. Reconnecting...")
-                time.sleep(self.RECONNECT_INTERVAL)
+                # Try reconnecting, backing off while the server stays unavailable.
+                # Log only once per outage.
+                if reconnect_delay == self.RECONNECT_INTERVAL:
+                    if self.first_connect:
+                        self.logger.info(f"Connection for {self.name} to {self.ADDRESS} not yet established. Retrying...")
+                    else:
+                        self.logger.info(f"Connection for {self.name} to {self.ADDRESS} is lost. Reconnecting...")
+                time.sleep(reconnect_delay)
+                reconnect_delay = min(2 * reconnect_delay, self.RECONNECT_MAX_INTERVAL)
                 continue
 
+            reconnect_delay = self.RECONNECT_INTERVAL
+
             # Connected!
+            if self.reconnect == 'always':
+                # Initialization did not wait for the connection: ask for admin now,
+                # before the connection is made available to other threads, so that
+                # no call is made without admin rights.
+                try:
+                    conn.root.ask_admin(admin=self.request_admin)
+                except Exception:
+                    self.logger.exception('Could not request admin status.')
+
+            # Remote methods of a previous connection are not valid anymore
+            self._remote_methods = {}
+            self.conn = conn
             self._connected = True
 
             if self.first_connect:
@@ -508,8 +529,9 @@ class ProxyClientBase:
             self._active = True
             try:
                 while self._active:
+                    # Blocks until data arrives (or timeout). Replies to requests
+                    # made on other threads are dispatched here and notified.
                     self.conn.serve(self.SERVE_INTERVAL)
-                    time.sleep(self.SLEEP_INTERVAL)  # to reduce contention
                 break
             except EOFError:
                 # Connection closed!
@@ -576,6 +598,18 @@ class ProxyClientBase:
         self.stats['max_reply_time'] = max(dt, maxr)
         self.stats['last_reply_time'] = t0
 
+    def _remote(self, name):
+        """
+        Return the remote service method name. Remote methods are cached to
+        avoid a round trip to the server for each attribute access.
+        """
+        try:
+            return self._remote_methods[name]
+        except KeyError:
+            method = getattr(self.conn.root, name)
+            self._remote_methods[name] = method
+            return method
+
     @classmethod
     def _new_property(cls, name, doc):
         """
@@ -589,7 +623,7 @@ class ProxyClientBase:
         # Create getter
         def fget(client_self):
             t0 = time.time()
-            method = getattr(client_self.conn.root, f"_get_{name}")
+            method = client_self._remote(f"_get_{name}")
             reply = _um(method())
             client_self._update_stats(t0, time.time())
             return reply["result"]
@@ -597,7 +631,7 @@ class ProxyClientBase:
         # Create setter
         def fset(client_self, value):
             t0 = time.time()
-            method = getattr(client_self.conn.root, f"_set_{name}")
+            method = client_self._remote(f"_set_{name}")
             method(_m(value))
             client_self._update_stats(t0, time.time())
 
@@ -625,7 +659,7 @@ class ProxyClientBase:
             # In blocking mode, we just request the result and wait
             def method(client_self, *args, **kwargs):
                 t0 = time.time()
-                service_method = getattr(client_self.conn.root, name)
+                service_method = client_self._remote(name)
                 reply = _um(service_method(_m(args), _m(kwargs)))
                 client_self._update_stats(t0, time.time())
                 return reply["result"]
@@ -637,7 +671,7 @@ class ProxyClientBase:
                 t0 = time.time()
 
                 # Find remote method to call
-                service_method = getattr(client_self.conn.root, name)
+                service_method = client_self._remote(name)
 
                 # This calls the remote method, but since it is non-blocking it returns immediately
                 reply = _um(service_method(_m(args), _m(kwargs)))
@@ -721,6 +755,9 @@ class ProxyServerBase:
         # The instance method that gets called when an emergency stop is requested
         self.interrupt_method = None
 
+        # Bound instance methods exposed through the API (filled by create_instance)
+        self.methods = {}
+
         # The non-blocking thread
         self.awaiting_result = None
 
@@ -752,7 +789,8 @@ class ProxyServerBase:
         """
         Start serving
         """
-        # Create rpyc threaded server
+        # Create rpyc threaded server. The listener blocks in accept() instead of
+        # waking up every 0.5 s: close() shuts the socket down, which unblocks it.
         self.rpyc_server = ThreadedServer(
             service=self.service,
             port=self.ADDRESS[1],
@@ -761,6 +799,7 @@ class ProxyServerBase:
                 "allow_setattr": True,
                 "allow_delattr": True,
             },
+            listener_timeout=None,
             disconnect_callback=self.del_client,
         )
 
@@ -955,6 +994,11 @@ class ProxyServerBase:
             self.instance = None
             raise
 
+        # Bind exposed methods once to avoid a lookup at every call
+        self.methods = {method_name: getattr(self.instance, method_name)
+                        for method_name, api_info in self.API.items()
+                        if not api_info["property"]}
+
         # Look for interrupt call
         self.interrupt_method = None
         for method_name, api_info in self.API.items():
@@ -53,8 +53,8 @@ def ask(question, choices=None, clab=None, cval=None, default=None, help=None, a
     else:
         labels = dict((k, v) for k, v in zip(keys, clab))
 
-    if default not in keys:
-        RuntimeError(f'default {default} not part of choices.')
+    if default is not None and default not in keys:
+        raise RuntimeError(f'default {default} not part of choices.')
 
     # If not working interactive, accept all defaults and raise error for cases without default
     if not is_interactive():
@@ -107,8 +107,9 @@ def user_prompt(question, default=None, help=None):
     """
     if help is not None:
         question += ' (? for help)'
+    prompt = question + ' '
     while True:
-        r = input(question + ' ')
+        r = input(prompt)
         if not r:
             if default is None:
                 print('No default answer. Enter text.')
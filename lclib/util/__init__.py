@@ -9,6 +9,7 @@ def utcnow():
 from .filedict import FileDict
 from .datalogger import DataLogger
 from .future import Future
-from .h5rw import h5read, h5write
+from . import jsonenc
+from .h5rw import h5read, h5write, h5memmap
 from .imstream import FramePublisher, FrameSubscriber
 from . import frameconsumer
@@ -10,12 +10,18 @@ This file is part of lab-control-lib
 
 from functools import wraps
 from datetime import datetime
+import atexit
 import logging
 import importlib.util
 from . import utcnow
+from . import jsonenc
 
 DEFAULT_BUCKET = 'labcontrol'
 
+# Points are written to the database in batches, at least every FLUSH_INTERVAL milliseconds
+BATCH_SIZE = 100
+FLUSH_INTERVAL = 1000
+
 logger = logging.getLogger(__name__)
 
 # Try to import influxdb
@@ -23,7 +29,6 @@ if importlib.util.find_spec('influxdb_client') is not None:
     import influxdb_client
 else:
     logger.debug("Module influxdb_client unavailable on this host")
-    import json
     globals().update({'influxdb_client': None})
 
 
@@ -70,9 +75,14 @@ class DataLogger:
 
         self.client = None
         self.write_api = None
+        self.json_file = None
         self._stop = False
+        self._closed = False
         self.start()
 
+        # Flush pending points on exit
+        atexit.register(self.close)
+
     def meta(self, field_name, tags):
         """
         Method decorator to declare that its output is metadate to be logged.
@@ -118,9 +128,28 @@ class DataLogger:
         """
         Connect the client to the database.
         """
+        self._closed = False
         if influxdb_client and not self.client:
             self.client = influxdb_client.InfluxDBClient(url=self.url, org='optimato', token=self.token)
-            self.write_api = self.client.write_api(write_options=influxdb_client.client.write_api.SYNCHRONOUS)
+            # Batching mode: points are queued and written by a background thread.
+            write_options = influxdb_client.client.write_api.WriteOptions(batch_size=BATCH_SIZE,
+                                                                          flush_interval=FLUSH_INTERVAL)
+            self.write_api = self.client.write_api(write_options=write_options)
+
+    def close(self):
+        """
+        Flush pending points and close the client. Entries logged afterwards are dropped.
+        """
+        self._closed = True
+        if self.write_api is not None:
+            self.write_api.close()
+            self.write_api = None
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+        if self.json_file is not None:
+            self.json_file.close()
+            self.json_file = None
 
     def get_tags(self):
         """
@@ -133,6 +162,9 @@ class DataLogger:
         Add the data (a dictionary of fields) and tags as a new measurement. If timeval is None (default)
         set time of the point as now.
         """
+        if self._closed:
+            return
+
         if timeval is None:
             timeval = utcnow()
 
@@ -144,7 +176,12 @@ class DataLogger:
         }
 
         if influxdb_client:
-            self.write_api.write(bucket=self.bucket, record=influxdb_client.Point.from_dict(pt))
+            write_api = self.write_api
+            if write_api is None:
+                return
+            write_api.write(bucket=self.bucket, record=influxdb_client.Point.from_dict(pt))
         else:
-            line = json.dumps(pt) + '\n'
-            open(f'{self.bucket}.json', 'a').write(line)
\ No newline at end of file
+            if self.json_file is None:
+                self.json_file = open(f'{self.bucket}.json', 'ab')
+            self.json_file.write(jsonenc.dumpb(pt) + b'\n')
+            self.json_file.flush()
\ No newline at end of file
@@ -4,21 +4,92 @@ A Dictionary that keeps its state saved on file.
 This file is part of lab-control-lib
 (c) 2023-2024 Pierre Thibault (pthibault@units.it)
 """
-import json
 import os
+import json
+import time
 import threading
+import atexit
+import logging
 
 __all__ = ['FileDict']
 
+logger = logging.getLogger(__name__)
+
+# Deferred saves: all FileDicts with pending changes are written by a single
+# background thread. {id(filedict): filedict}
+_pending = {}
+_pending_lock = threading.Lock()
+_pending_event = threading.Event()
+_flush_thread = None
+
+
+def _flush_loop():
+    """
+    Write pending FileDicts when their save is due.
+    """
+    while True:
+        _pending_event.wait()
+        with _pending_lock:
+            if not _pending:
+                _pending_event.clear()
+                continue
+            now = time.monotonic()
+            next_due = min(fd._save_due for fd in _pending.values())
+            due = [] if next_due > now else [_pending.pop(k) for k, fd in list(_pending.items()) if fd._save_due <= now]
+            for fd in due:
+                fd._save_due = None
+        if not due:
+            time.sleep(next_due - now)
+            continue
+        for fd in due:
+            try:
+                fd._write()
+            except Exception:
+                logger.exception(f'Could not save {fd.filename}')
+
+
+def _flush_all():
+    """
+    Write all pending FileDicts now (called at exit).
+    """
+    with _pending_lock:
+        due = list(_pending.values())
+        _pending.clear()
+        for fd in due:
+            fd._save_due = None
+    for fd in due:
+        # One failing file must not prevent the others from being saved
+        try:
+            fd._write()
+        except Exception:
+            logger.exception(f'Could not save {fd.filename}')
+
+
+atexit.register(_flush_all)
+
 
 class FileDict(dict):
     """
     A dictionary that dumps its state on file.
+
+    Before each modification, the file is read again to pick up external
+    changes, unless its modification time and size show that it has not
+    changed since it was last read or written.
+
+    The file is written atomically (to a temporary file which then replaces
+    the original) so that an interrupted save cannot leave it corrupt.
+
+    If save_delay is not None, saves are deferred by save_delay seconds so
+    that a burst of modifications results in a single write. While a save is
+    pending, the in-memory state takes precedence over the file.
     """
-    def __init__(self, filename, *args, **kwargs):
+    def __init__(self, filename, *args, save_delay=None, **kwargs):
         self.filename = filename
         self.access_lock = threading.Lock()
         self._to_file = True
+        self._stamp = None
+        self.save_delay = save_delay
+        self._save_due = None
 
         if not os.path.exists(filename):
             os.makedirs(os.path.split(filename)[0], exist_ok=True)
@@ -27,14 +98,14 @@ class FileDict(dict):
         try:
             self._load()
         except IOError:
-            self._save()
-        except json.decoder.JSONDecodeError as e:
+            self._write()
+        except ValueError as e:
             raise RuntimeError('Json decoding error - file corrupt?') from e
 
     def __getitem__(self, y):
-        #self._load()
-        with self.access_lock:
-            return dict.__getitem__(self, y)
+        # No lock: a single dict lookup is atomic, and access_lock only
+        # needs to serialize file access and compound updates.
+        return dict.__getitem__(self, y)
 
     def __setitem__(self, i, y):
         self._load()
@@ -75,16 +146,80 @@ class FileDict(dict):
         self._to_file = True
         self._save()
 
+    def _file_stamp(self):
+        """
+        Modification time and size of the file, used to detect changes.
+        """
+        st = os.stat(self.filename)
+        return st.st_mtime_ns, st.st_size
+
     def _load(self):
         if not self._to_file:
             return
         with self.access_lock:
-            with open(self.filename, 'r') as f:
-                dict.update(self, json.load(f))
+            if self._save_due is not None:
+                # Local changes not yet saved
+                return
+            stamp = self._file_stamp()
+            if stamp == self._stamp:
+                # Unchanged since last read or write
+                return
+            # Config files are small: read them in one call and parse the bytes directly
+            fd = os.open(self.filename, os.O_RDONLY | os.O_CLOEXEC)
+            try:
+                data = os.read(fd, stamp[1])
+            finally:
+                os.close(fd)
+            dict.update(self, json.loads(data))
+            self._stamp = stamp
 
     def _save(self):
         if not self._to_file:
             return
+        if self.save_delay is None:
+            self._write()
+            return
+        global _flush_thread
+        with _pending_lock:
+            if self._save_due is None:
+                self._save_due = time.monotonic() + self.save_delay
+                _pending[id(self)] = self
+            if _flush_thread is None:
+                _flush_thread = threading.Thread(target=_flush_loop, daemon=True)
+                _flush_thread.start()
+        _pending_event.set()
+
+    def flush(self):
+        """
+        Write pending changes to file now.
+        """
+        with _pending_lock:
+            if _pending.pop(id(self), None) is None:
+                return
+            self._save_due = None
+        self._write()
+
+    def _write(self):
         with self.access_lock:
-            with open(self.filename, 'w') as f:
-                json.dump(dict(self), f)
\ No newline at end of file
+            data = json.dumps(self).encode()
+            tmp = f'{self.filename}.{os.getpid()}.tmp'
+            # O_CLOEXEC: do not leak the descriptor into forked worker processes
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o644)
+            try:
+                try:
+                    view = memoryview(data)
+                    while view:
+                        # os.write may write fewer bytes than requested
+                        view = view[os.write(fd, view):]
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                os.replace(tmp, self.filename)
+            except BaseException:
+                # Do not leave the temporary file behind
+                try:
+                    os.unlink(tmp)
+                except FileNotFoundError:
+                    pass
+                raise
+            self._stamp = self._file_stamp()
\ No newline at end of file
@@ -1,3 +1,3 @@
 from ...logs import logger
-from .frameconsumer import FrameWriter, FrameStreamer
+from .frameconsumer import FrameWriter, FrameStreamer, load_meta
 from .remote import FrameWriterProcess, FrameStreamerProcess
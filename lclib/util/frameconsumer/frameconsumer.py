@@ -8,26 +8,170 @@ This file is part of lab-control-lib
 
 import os
 import os.path
+import time
 import numpy as np
+import h5py
 import copy
-from queue import SimpleQueue, Empty
+import importlib.util
+from queue import Queue, Empty, Full
 
 from .. import FramePublisher
 from .. import Future
+from .. import jsonenc
+from ..h5rw import h5append, h5read
 from . import logger as rootlogger
-from .. import h5write
 
-__all__ = ['FrameWriter', 'FrameStreamer']
+__all__ = ['FrameWriter', 'FrameStreamer', 'load_meta']
+
+# Try to import blosc (used for direct chunk write)
+if importlib.util.find_spec('blosc') is not None:
+    import blosc
+    # Leave half of the cores to acquisition
+    blosc.set_nthreads(max(1, (os.cpu_count() or 2) // 2))
+else:
+    rootlogger.debug("Module blosc unavailable on this host")
+    globals().update({'blosc': None})
+
+# Try to import hdf5plugin (provides the blosc HDF5 filter)
+if importlib.util.find_spec('hdf5plugin') is not None:
+    import hdf5plugin
+else:
+    rootlogger.debug("Module hdf5plugin unavailable on this host")
+    globals().update({'hdf5plugin': None})
+
+# HDF5 filter id for Blosc, and compression parameters (lz4 compressor code and level)
+BLOSC_FILTER_ID = 32001
+BLOSC_LZ4 = 1
+BLOSC_CLEVEL = 5
+
+# Target size of HDF5 chunks
+H5_CHUNK_BYTES = 1 << 20
+
+# Number of slots in the HDF5 chunk cache hash table
+H5_CACHE_SLOTS = 100003
+
+# Memory increment of the HDF5 core (in-memory) driver
+H5_CORE_BLOCK_SIZE = 16 << 20
+
+# Version of the frame file layout, stored in the 'format_version' file attribute
+FORMAT_VERSION = 1
+
+
+def chunk_shape(shape, itemsize, target=H5_CHUNK_BYTES):
+    """
+    Compute a chunk shape for a stack of frames of the given shape.
+
+    Small frames are grouped along the first axis (at most shape[0] frames
+    per chunk). Large frames are split: the frame dimensions are halved
+    (largest first) until the chunk fits in `target` bytes.
+    """
+    frame_bytes = int(np.prod(shape[1:])) * itemsize
+    if frame_bytes <= target:
+        frames_per_chunk = max(1, min(shape[0], target // max(frame_bytes, 1)))
+        return (frames_per_chunk,) + tuple(shape[1:])
+    chunk = [1] + list(shape[1:])
+    while len(chunk) > 1 and np.prod(chunk) * itemsize > target:
+        i = int(np.argmax(chunk[1:])) + 1
+        if chunk[i] == 1:
+            break
+        chunk[i] = (chunk[i] + 1) // 2
+    return tuple(chunk)
+
+
+def _same(a, b):
+    """
+    Equality test that does not choke on numpy arrays.
+    """
+    try:
+        return bool(a == b)
+    except ValueError:
+        return False
+
+
+def split_meta(metas):
+    """
+    Split a list of metadata dictionaries into the part common to all of them
+    and the per-item differences. Nested dictionaries are split recursively.
+
+    Returns:
+        (common, deltas): a dictionary and a list of dictionaries, one per item
+    """
+    common = {}
+    deltas = [{} for _ in metas]
+    if not metas:
+        return common, deltas
+    keys = set().union(*metas)
+    for k in keys:
+        values = [m.get(k) for m in metas]
+        if all(k in m for m in metas):
+            if all(_same(values[0], v) for v in values[1:]):
+                common[k] = values[0]
+                continue
+            if all(isinstance(v, dict) for v in values):
+                sub_common, sub_deltas = split_meta(values)
+                if sub_common:
+                    common[k] = sub_common
+                for d, sub_delta in zip(deltas, sub_deltas):
+                    if sub_delta:
+                        d[k] = sub_delta
+                continue
+        for d, m in zip(deltas, metas):
+            if k in m:
+                d[k] = m[k]
+    return common, deltas
+
+
+def merge_meta(common, delta):
+    """
+    Inverse of split_meta for one item: rebuild a metadata dictionary from the
+    common part and the item's differences.
+    """
+    meta = dict(common)
+    for k, v in delta.items():
+        if isinstance(v, dict) and isinstance(meta.get(k), dict):
+            meta[k] = merge_meta(meta[k], v)
+        else:
+            meta[k] = v
+    return meta
+
+
+def load_meta(filename):
+    """
+    Load the metadata of a frame file written by HDF5Worker, whatever the
+    metadata format: 'meta' group (default, also readable with h5read),
+    json-encoded file attribute or json sidecar file. Metadata stored split
+    ('json-split' format) is merged back.
+
+    Returns:
+        the list of per-frame metadata dictionaries.
+    """
+    with h5py.File(filename, 'r') as f:
+        meta_format = f.attrs.get('meta_format', 'h5')
+        meta_file = f.attrs.get('meta_file')
+        if meta_format != 'h5' and meta_file is None:
+            d = {'meta': jsonenc.loads(f.attrs['meta'])}
+            if meta_format == 'json-split':
+                d['frame_meta'] = jsonenc.loads(f.attrs['frame_meta'])
+    if meta_format == 'h5':
+        return h5read(filename, 'meta')['meta']
+    if meta_file is not None:
+        with open(os.path.join(os.path.dirname(filename), meta_file), 'rb') as f:
+            d = jsonenc.loads(f.read())
+    if meta_format == 'json-split':
+        return [merge_meta(d['meta'], delta) for delta in d['frame_meta']]
+    return d['meta']
 
 
 class FrameWorker:
 
     QUEUE_MAX_WAIT = 1.
+    QUEUE_MAXSIZE = 8         # Bounded queue: new_data blocks when full (back pressure)
+    DROP_WHEN_FULL = False    # If True, new_data drops frames instead of blocking
     logger = rootlogger.getChild('FrameWorker')
 
     def __init__(self, *args, **kwargs):
 
-        self.queue = SimpleQueue()
+        self.queue = Queue(maxsize=self.QUEUE_MAXSIZE)
         self._terminate = False
 
         # Start loop
@@ -83,7 +227,13 @@ class FrameWorker:
         Args:
             data: New data to process
         """
-        self.queue.put(data)
+        if not self.DROP_WHEN_FULL:
+            self.queue.put(data)
+            return
+        try:
+            self.queue.put_nowait(data)
+        except Full:
+            self.logger.warning('Worker queue is full. Dropping one frame!')
 
     def close(self):
         if self.future.done():
@@ -99,18 +249,77 @@ class FrameWorker:
 
 class HDF5Worker(FrameWorker):
     """
-    A worker that accumulates frames and stores to hdf5 file upon completion.
+    A worker that writes frames to a hdf5 file as they arrive, and stores
+    metadata upon completion.
     """
     logger = rootlogger.getChild('HDF5Worker')
 
-    def __init__(self, filename):
-
+    def __init__(self, filename, n_frames=None, chunk_shape=None, compression='gzip', shuffle=True,
+                 direct_chunk_write=False, quantize_bits=None, quantize_shift=0, quantize_offset=0,
+                 core_driver=False, metadata_format='h5', metadata_sidecar=False):
+        """
+        Args:
+            filename: the file to save to
+            n_frames: expected number of frames, used to size the dataset.
+            chunk_shape: HDF5 chunk shape. If None, chunks of about H5_CHUNK_BYTES are used.
+            compression: 'gzip' (default, level 4, readable by any HDF5 tool), 'lzf'
+                         (faster, but the filter is only available through h5py),
+                         'blosc' (lz4 with byte shuffle, multithreaded, needs hdf5plugin)
+                         or None
+            shuffle: if True, apply the shuffle filter before compression. With blosc
+                     (compression='blosc' or direct_chunk_write), 'bit' selects bitshuffle,
+                     which works best on low-entropy integer frames.
+            direct_chunk_write: if True, compress frames with blosc (lz4) as they
+                                arrive and write them directly as HDF5 chunks,
+                                bypassing the filter pipeline.
+            quantize_bits: if not None, (lossy) quantize integer frames to this number of bits:
+                           frames are stored as (frame - quantize_offset) >> quantize_shift,
+                           clipped to [0, 2**quantize_bits - 1], in the smallest fitting dtype.
+            quantize_shift: see quantize_bits
+            quantize_offset: see quantize_bits
+            core_driver: if True, the file is built in memory (HDF5 core driver) and
+                         written to disk only when closed.
+            metadata_format: 'h5' (default) stores the list of per-frame metadata in the
+                             'meta' group, readable with h5read. 'json' stores it
+                             json-encoded in the 'meta' file attribute, which is faster
+                             to write for large metadata. 'json-split' stores the
+                             metadata common to all frames once ('meta') and the list of
+                             per-frame differences ('frame_meta').
+            metadata_sidecar: if True, metadata is saved json-encoded in a file next to
+                              the hdf5 file (filename + '.json'). Implies a json metadata_format.
+            Use load_meta to read metadata back in all cases.
+        """
+        if compression == 'blosc' and hdf5plugin is None:
+            self.logger.warning('hdf5plugin is not available: using gzip compression instead of blosc.')
+            compression = 'gzip'
+        if direct_chunk_write and blosc is None:
+            self.logger.warning('blosc is not available: direct chunk write disabled.')
+            direct_chunk_write = False
         # Prepare path on the main thread to catch errors.
         b, f = os.path.split(filename)
         os.makedirs(b, exist_ok=True)
 
         self.filename = filename
-        self.frames = []
+        self.chunk_shape = chunk_shape
+        self.compression = compression
+        self.shuffle = shuffle
+        self._blosc_shuffle = 2 if shuffle == 'bit' else 1 if shuffle else 0
+        self.direct_chunk_write = direct_chunk_write
+        self.n_frames = n_frames
+        self.quantize_bits = quantize_bits
+        self.quantize_shift = quantize_shift
+        self.quantize_offset = quantize_offset
+        self.core_driver = core_driver
+        if metadata_sidecar and metadata_format == 'h5':
+            metadata_format = 'json'
+        self.metadata_format = metadata_format
+        self.metadata_sidecar = metadata_sidecar
+        self._qbuffers = None
+        self._batch = None
+        self._nbatch = 0
+        self.h5file = None
+        self.dset = None
+        self.count = 0
         self.meta = []
 
         # Start worker
@@ -123,28 +332,189 @@ class HDF5Worker(FrameWorker):
             item: (data, meta)
         """
         data, meta = item
-        self.frames.append(data)
+        if self.quantize_bits:
+            data = self._quantize(data)
+        self._write_frame(data)
         self.meta.append(meta)
 
+    def _quantize(self, data):
+        """
+        Quantize integer frame. Values can be approximately restored with
+        (q << quantize_shift) + quantize_offset.
+
+        The returned array is a buffer reused for all frames: it has to be
+        consumed before the next call.
+        """
+        if data.dtype.kind not in 'iu':
+            self.logger.warning(f'Cannot quantize frame of type {data.dtype}. Storing as is.')
+            return data
+
+        # Work and output buffers are allocated once per acquisition
+        if self._qbuffers is None or self._qbuffers[0].shape != data.shape:
+            dtype = np.uint8 if self.quantize_bits <= 8 else np.uint16 if self.quantize_bits <= 16 else np.uint32
+            self._qbuffers = (np.empty(data.shape, dtype=np.int64), np.empty(data.shape, dtype=dtype))
+        q, out = self._qbuffers
+
+        np.copyto(q, data)
+        q -= self.quantize_offset
+        q >>= self.quantize_shift
+        np.clip(q, 0, 2**self.quantize_bits - 1, out=q)
+        np.copyto(out, q, casting='unsafe')
+        return out
+
+    def _create_dataset(self, data):
+        """
+        Open the file and create the dataset, sized for the expected number of frames.
+        """
+        shape = (self.n_frames or 1,) + data.shape
+        chunks = self.chunk_shape
+        if chunks is None:
+            chunks = chunk_shape(shape, data.itemsize)
+        if self.direct_chunk_write:
+            # One chunk per frame, compressed in _write_frame
+            chunks = (1,) + data.shape
+            compression_kwargs = {'compression': BLOSC_FILTER_ID,
+                                  'compression_opts': (0, 0, 0, 0, BLOSC_CLEVEL, self._blosc_shuffle, BLOSC_LZ4),
+                                  'allow_unknown_filter': True}
+        elif self.compression == 'blosc':
+            # Blosc does its own shuffling
+            compression_kwargs = dict(hdf5plugin.Blosc(cname='lz4', clevel=BLOSC_CLEVEL, shuffle=self._blosc_shuffle))
+        else:
+            compression_kwargs = {'shuffle': bool(self.shuffle and self.compression),
+                                  'compression': self.compression,
+                                  'compression_opts': 4 if self.compression == 'gzip' else None}
+
+        # Size the chunk cache to hold twice all the chunks touched by one frame, so that
+        # chunks are not evicted (and re-read) before they are complete.
+        chunks_per_frame = int(np.prod([-(-n // c) for n, c in zip(data.shape, chunks[1:])]))
+        cache_bytes = 2 * chunks_per_frame * int(np.prod(chunks)) * data.itemsize
+        driver_kwargs = {}
+        if self.core_driver:
+            driver_kwargs = {'driver': 'core', 'backing_store': True, 'block_size': H5_CORE_BLOCK_SIZE}
+        self.h5file = h5py.File(self.filename, 'w',
+                                rdcc_nbytes=max(cache_bytes, H5_CHUNK_BYTES),
+                                rdcc_nslots=H5_CACHE_SLOTS,
+                                rdcc_w0=1.,
+                                **driver_kwargs)
+        self.dset = self.h5file.create_dataset('data',
+                                               shape=shape,
+                                               maxshape=(None,) + data.shape,
+                                               dtype=data.dtype,
+                                               chunks=tuple(chunks),
+                                               **compression_kwargs)
+        if chunks[0] > 1:
+            # Chunks hold several frames: collect them and write whole chunks at once.
+            self._batch = np.empty((chunks[0],) + data.shape, dtype=data.dtype)
+
+    def _write_frame(self, data):
+        """
+        Write frame in the next slot of the dataset, growing it if needed.
+        """
+        if self.dset is None:
+            self._create_dataset(data)
+        if self._batch is not None:
+            self._batch[self._nbatch] = data
+            self._nbatch += 1
+            self.count += 1
+            if self._nbatch == len(self._batch):
+                self._flush_batch()
+            return
+        self._grow(self.count + 1)
+        if self.direct_chunk_write:
+            # Compress and write directly as a chunk, bypassing the filter pipeline
+            data = np.ascontiguousarray(data)
+            chunk = blosc.compress_ptr(data.__array_interface__['data'][0],
+                                       data.size,
+                                       typesize=data.itemsize,
+                                       clevel=BLOSC_CLEVEL,
+                                       shuffle=self._blosc_shuffle,
+                                       cname='lz4')
+            self.dset.id.write_direct_chunk((self.count,) + (0,) * data.ndim, chunk)
+        else:
+            self.dset[self.count] = data
+        self.count += 1
+
+    def _flush_batch(self):
+        """
+        Write the frames collected in the batch buffer.
+        """
+        if not self._nbatch:
+            return
+        start = self.count - self._nbatch
+        self._grow(self.count)
+        self.dset[start:self.count] = self._batch[:self._nbatch]
+        self._nbatch = 0
+
+    def _grow(self, size):
+        """
+        Grow the dataset to hold at least size frames.
+        """
+        if size > len(self.dset):
+            self.logger.debug(f'More frames than expected: growing dataset beyond {len(self.dset)}.')
+            self.dset.resize(size, axis=0)
+
     def _finalize(self):
         """
         Store to file
         """
-        data = np.array(self.frames)
-        h5write(filename=self.filename, meta=self.meta, data=data)
-        self.logger.debug(f"{len(self.frames)} frames saved to {self.filename}")
+        if self.dset is None:
+            self.logger.warning(f"No frame to save in {self.filename}")
+            return
+
+        with self.h5file as f:
+            self._flush_batch()
+            if self.count < len(self.dset):
+                # Fewer frames than expected
+                self.dset.resize(self.count, axis=0)
+            self._write_meta(f)
+        self.logger.debug(f"{self.count} frames saved to {self.filename}")
+
+    def _write_meta(self, f):
+        """
+        Store the list of per-frame metadata in the 'meta' group (as h5write
+        does), or json-encoded in file attributes or a sidecar file, optionally
+        split in common part and per-frame differences.
+        """
+        f.attrs['ctime'] = time.asctime()
+        f.attrs['format_version'] = FORMAT_VERSION
+        f.attrs['meta_format'] = self.metadata_format
+        if self.metadata_format == 'json-split':
+            common, deltas = split_meta(self.meta)
+            d = {'meta': common, 'frame_meta': deltas}
+        else:
+            d = {'meta': self.meta}
+        if self.metadata_format == 'h5':
+            h5append(f, meta=self.meta)
+        elif self.metadata_sidecar:
+            meta_file = self.filename + '.json'
+            # Write to a temporary file and rename: readers never see a partial file
+            tmp = meta_file + '.tmp'
+            with open(tmp, 'wb') as fm:
+                fm.write(jsonenc.dumpb(d))
+            os.replace(tmp, meta_file)
+            f.attrs['meta_file'] = os.path.basename(meta_file)
+        else:
+            for k, v in d.items():
+                f.attrs[k] = jsonenc.dumps(v)
+        if self.quantize_bits:
+            f['data'].attrs.update({'quantize_bits': self.quantize_bits,
+                                    'quantize_shift': self.quantize_shift,
+                                    'quantize_offset': self.quantize_offset})
 
 
 class StreamWorker(FrameWorker):
     """
     A worker that streams frames.
     """
+    # Streaming is real-time: drop frames rather than falling behind
+    QUEUE_MAXSIZE = 2
+    DROP_WHEN_FULL = True
     logger = rootlogger.getChild('StreamWorker')
 
-    def __init__(self, broadcast_port):
+    def __init__(self, broadcast_port, compress=False):
 
         self.broadcast_port = broadcast_port
-        self.broadcaster = FramePublisher(port=self.broadcast_port)
+        self.broadcaster = FramePublisher(port=self.broadcast_port, compress=compress)
 
         # Start worker
         super().__init__()
@@ -251,13 +621,14 @@ class FrameWriter(FrameConsumer):
     def __init__(self):
         super().__init__()
 
-    def open(self, filename):
+    def open(self, filename, **kwargs):
         """
         Start new worker
         Args:
             filename: the file to save to
+            kwargs: storage options passed to the worker (see HDF5Worker)
         """
-        self.start_worker(filename=filename)
+        self.start_worker(filename=filename, **kwargs)
 
     def close(self):
         """
@@ -272,12 +643,13 @@ class FrameStreamer(FrameConsumer):
     """
     WORKER = StreamWorker
 
-    def __init__(self, broadcast_port):
+    def __init__(self, broadcast_port, compress=False):
         """
-        Frame publisher.
+        Frame publisher. If compress is True, frames are sent blosc-compressed.
         """
         super().__init__()
         self.broadcast_port = broadcast_port
+        self.compress = compress
 
     def on(self):
         """
@@ -287,7 +659,7 @@ class FrameStreamer(FrameConsumer):
             self.close_worker()
         except RuntimeError:
             pass
-        self.start_worker(broadcast_port=self.broadcast_port)
+        self.start_worker(broadcast_port=self.broadcast_port, compress=self.compress)
 
     def off(self):
         """
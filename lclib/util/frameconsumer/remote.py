@@ -143,11 +143,12 @@ class FrameWriterProcess(FrameConsumerProcess):
     def __init__(self):
         super().__init__()
 
-    def open(self, filename):
+    def open(self, filename, **kwargs):
         """
         Connect to remote service
         Args:
             filename: where to save data
+            kwargs: storage options passed to the worker (see HDF5Worker)
         """
         self.conn = rpyc.connect(host="localhost", port=self.PORT)
 
@@ -155,7 +156,7 @@ class FrameWriterProcess(FrameConsumerProcess):
         b, f = os.path.split(filename)
         os.makedirs(b, exist_ok=True)
 
-        self.conn.root.open(filename)
+        self.conn.root.open(filename, **kwargs)
 
     def close(self):
         """
@@ -223,11 +224,11 @@ class FrameWriterRemoteService(FrameConsumerRemoteService):
         super().on_connect(conn)
         self.frame_consumer_instance = FrameWriter()
 
-    def exposed_open(self, filename):
+    def exposed_open(self, filename, **kwargs):
         """
         Open frame writer
         """
-        self.frame_consumer_instance.open(filename=filename)
+        self.frame_consumer_instance.open(filename=filename, **kwargs)
 
     def process_frame(self, data, meta):
         """
@@ -59,13 +59,15 @@ class Future:
         except BaseException as error:
             # Catch any error
             self._error = error
-        if self._callback is not None:
-            # Callback with result and/or error
-            self._callback(self._result, self._error)
+        try:
+            if self._callback is not None:
+                # Callback with result and/or error
+                self._callback(self._result, self._error)
+            elif self._error is not None:
+                raise self._error
+        finally:
+            # Mark as done even if the error is re-raised on the thread
             self._done = True
-        elif self._error is not None:
-            raise self._error
-        self._done = True
 
     def exception(self, timeout=None):
         """
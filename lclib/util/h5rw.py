@@ -17,7 +17,7 @@ import logging
 
 logger = logging.getLogger()
 
-__all__ = ['h5write', 'h5append', 'h5read', 'h5info', 'h5options']
+__all__ = ['h5write', 'h5append', 'h5read', 'h5memmap', 'h5info', 'h5options']
 
 h5options = dict(
     H5RW_VERSION='0.1',
@@ -482,6 +482,71 @@ def h5read(filename, *args, **kwargs):
             d = d.encode()
         return pickle.loads(d)
 
+    def _sliced(val, sl):
+        return val if sl is None else val[sl]
+
+    def _read_dict(dset, depth, sl):
+        if sl is not None:
+            raise RuntimeError('Dictionaries do not support slicing')
+        return _load_dict(dset, depth)
+
+    def _read_list(dset, depth, sl):
+        return _sliced(_load_list(dset, depth), sl)
+
+    def _read_ordered_dict(dset, depth, sl):
+        return _load_ordered_dict(dset, depth)
+
+    def _read_numpy(dset, depth, sl):
+        return _load_numpy(dset, sl)
+
+    def _read_arraylist(dset, depth, sl):
+        return _sliced([x for x in _load_numpy(dset)], sl)
+
+    def _read_tuple(dset, depth, sl):
+        return _sliced(tuple(_load_list(dset, depth)), sl)
+
+    def _read_arraytuple(dset, depth, sl):
+        return _sliced(tuple(_load_numpy(dset).tolist()), sl)
+
+    def _read_str(dset, depth, sl):
+        return _sliced(_load_str(dset), sl)
+
+    def _read_record_array(dset, depth, sl):
+        return _load_numpy_record_array(dset)
+
+    def _read_unicode(dset, depth, sl):
+        return _sliced(_load_unicode(dset), sl)
+
+    def _read_scalar(dset, depth, sl):
+        return _load_scalar(dset)
+
+    def _read_None(dset, depth, sl):
+        # 24.4.13 : B.E. commented due to hr5read not being able to return None type
+        # try:
+        #   val = _load_numpy(dset)
+        # except:
+        #    val = None
+        return None
+
+    def _read_pickle(dset, depth, sl):
+        return _load_pickle(dset)
+
+    _readers = {'dict': _read_dict,
+                'param': _read_dict,
+                'list': _read_list,
+                'ordered_dict': _read_ordered_dict,
+                'array': _read_numpy,
+                'arraylist': _read_arraylist,
+                'tuple': _read_tuple,
+                'arraytuple': _read_arraytuple,
+                'string': _read_str,
+                'record_array': _read_record_array,
+                'unicode': _read_unicode,
+                'scalar': _read_scalar,
+                'None': _read_None,
+                'pickle': _read_pickle,
+                None: _read_numpy}
+
     def _load(dset, depth, sl=None):
         dset_type = dset.attrs.get('type', None)
         if isinstance(dset_type, bytes):
@@ -491,56 +556,10 @@ def h5read(filename, *args, **kwargs):
         if (dset_type is None) and (type(dset) is h5py.Group):
             dset_type = 'dict'
 
-        if dset_type == 'dict' or dset_type == 'param':
-            if sl is not None:
-                raise RuntimeError('Dictionaries do not support slicing')
-            val = _load_dict(dset, depth)
-        elif dset_type == 'list':
-            val = _load_list(dset, depth)
-            if sl is not None:
-                val = val[sl]
-        elif dset_type == 'ordered_dict':
-            val = _load_ordered_dict(dset, depth)
-        elif dset_type == 'array':
-            val = _load_numpy(dset, sl)
-        elif dset_type == 'arraylist':
-            val = [x for x in _load_numpy(dset)]
-            if sl is not None:
-                val = val[sl]
-        elif dset_type == 'tuple':
-            val = tuple(_load_list(dset, depth))
-            if sl is not None:
-                val = val[sl]
-        elif dset_type == 'arraytuple':
-            val = tuple(_load_numpy(dset).tolist())
-            if sl is not None:
-                val = val[sl]
-        elif dset_type == 'string':
-            val = _load_str(dset)
-            if sl is not None:
-                val = val[sl]
-        elif dset_type == 'record_array':
-            val = _load_numpy_record_array(dset)
-        elif dset_type == 'unicode':
-            val = _load_unicode(dset)
-            if sl is not None:
-                val = val[sl]
-        elif dset_type == 'scalar':
-            val = _load_scalar(dset)
-        elif dset_type == 'None':
-            # 24.4.13 : B.E. commented due to hr5read not being able to return None type
-            # try:
-            #   val = _load_numpy(dset)
-            # except:
-            #    val = None
-            val = None
-        elif dset_type == 'pickle':
-            val = _load_pickle(dset)
-        elif dset_type is None:
-            val = _load_numpy(dset, sl)
-        else:
+        reader = _readers.get(dset_type)
+        if reader is None:
             raise RuntimeError('Unsupported data type : %s' % dset_type)
-        return val
+        return reader(dset, depth, sl)
 
     # Read file content
     outdict = {}
@@ -599,6 +618,32 @@ def h5read(filename, *args, **kwargs):
     return outdict
 
 
+def h5memmap(filename, path):
+    """\
+    h5memmap(filename, path)
+
+    Memory-map a dataset of an hdf5 file, to slice large arrays lazily
+    without going through the hdf5 library.
+
+    This works only for contiguous (not chunked, not compressed) numerical
+    datasets, e.g. as written by h5write with compress=False.
+
+    Returns:
+        a read-only numpy.memmap
+    """
+    filename = os.path.abspath(os.path.expanduser(filename))
+    with h5py.File(filename, 'r') as f:
+        dset = f[path]
+        if dset.chunks is not None:
+            raise RuntimeError(f'Dataset {path} is chunked and cannot be memory-mapped.')
+        offset = dset.id.get_offset()
+        if offset is None:
+            raise RuntimeError(f'Dataset {path} has no storage allocated.')
+        dtype = dset.dtype
+        shape = dset.shape
+    return np.memmap(filename, dtype=dtype, mode='r', shape=shape, offset=offset)
+
+
 def h5info(filename, path='', output=None, depth=8):
     """\
     h5info(filename)
@@ -619,6 +664,9 @@ def h5info(filename, path='', output=None, depth=8):
                 stringout += _format(d - 1, (key[0] + indent, k), v)
         return stringout
 
+    def _format_param(d, key, dset):
+        return _format_dict(d, key, dset, True)
+
     def _format_list(d, key, dset):
         stringout = ' ' * key[0] + ' * %s [list %d]:\n' % (key[1], len(dset))
         if d > 0:
@@ -628,7 +676,7 @@ def h5info(filename, path='', output=None, depth=8):
                 stringout += _format(d - 1, (key[0] + indent, ''), dset[k])
         return stringout
 
-    def _format_tuple(key, dset):
+    def _format_tuple(d, key, dset):
         stringout = ' ' * key[0] + ' * %s [tuple]:\n' % key[1]
         if d > 0:
             keys = list(dset.keys())
@@ -637,7 +685,7 @@ def h5info(filename, path='', output=None, depth=8):
                 stringout += _format(d - 1, (key[0] + indent, ''), dset[k])
         return stringout
 
-    def _format_arraytuple(key, dset):
+    def _format_arraytuple(d, key, dset):
         a = dset[...]
         if len(a) < 5:
             stringout = ' ' * key[0] + ' * ' + key[1] + ' [tuple = ' + str(tuple(a.ravel())) + ']\n'
@@ -650,7 +698,7 @@ def h5info(filename, path='', output=None, depth=8):
                 stringout = ' ' * key[0] + ' * ' + key[1] + ' [tuple = (%d x %s objects)]\n' % (a.size, str(a.dtype))
         return stringout
 
-    def _format_arraylist(key, dset):
+    def _format_arraylist(d, key, dset):
         a = dset[...]
         if len(a) < 5:
             stringout = ' ' * key[0] + ' * ' + key[1] + ' [list = ' + str(a.tolist()) + ']\n'
@@ -663,7 +711,7 @@ def h5info(filename, path='', output=None, depth=8):
                 stringout = ' ' * key[0] + ' * ' + key[1] + ' [list = [%d x %s objects]]\n' % (a.size, str(a.dtype))
         return stringout
 
-    def _format_numpy(key, dset):
+    def _format_numpy(d, key, dset):
         a = dset[...]
         if len(a) < 5 and a.ndim == 1:
             stringout = ' ' * key[0] + ' * ' + key[1] + ' [array = ' + str(a.ravel()) + ']\n'
@@ -672,32 +720,45 @@ def h5info(filename, path='', output=None, depth=8):
                 a.dtype) + ' array]\n'
         return stringout
 
-    def _format_scalar(key, dset):
+    def _format_scalar(d, key, dset):
         stringout = ' ' * key[0] + ' * ' + key[1] + ' [scalar = ' + str(dset[...]) + ']\n'
         return stringout
 
-    def _format_str(key, dset):
+    def _format_str(d, key, dset):
         s = str(dset[...])
         if len(s) > 40:
             s = s[:40] + '...'
         stringout = ' ' * key[0] + ' * ' + key[1] + ' [string = "' + s + '"]\n'
         return stringout
 
-    def _format_unicode(key, dset):
+    def _format_unicode(d, key, dset):
         s = str(dset[...]).decode('utf8')
         if len(s) > 40:
             s = s[:40] + '...'
         stringout = ' ' * key[0] + ' * ' + key[1] + ' [unicode = "' + s + '"]\n'
         return stringout
 
-    def _format_None(key, dset):
+    def _format_None(d, key, dset):
         stringout = ' ' * key[0] + ' * ' + key[1] + ' [None]\n'
         return stringout
 
-    def _format_unknown(key, dset):
+    def _format_unknown(d, key, dset):
         stringout = ' ' * key[0] + ' * ' + key[1] + ' [unknown]\n'
         return stringout
 
+    _formatters = {'dict': _format_dict,
+                   'param': _format_param,
+                   'list': _format_list,
+                   'array': _format_numpy,
+                   'arraylist': _format_arraylist,
+                   'tuple': _format_tuple,
+                   'arraytuple': _format_arraytuple,
+                   'string': _format_str,
+                   'unicode': _format_unicode,
+                   'scalar': _format_scalar,
+                   'None': _format_None,
+                   None: _format_numpy}
+
     def _format(d, key, dset):
         dset_type = 'None' if dset is None else dset.attrs.get('type', None)
 
@@ -705,33 +766,7 @@ def h5info(filename, path='', output=None, depth=8):
         if (dset_type is None) and (type(dset) is h5py.Group):
             dset_type = 'dict'
 
-        if dset_type == 'dict':
-            stringout = _format_dict(d, key, dset, False)
-        elif dset_type == 'param':
-            stringout = _format_dict(d, key, dset, True)
-        elif dset_type == 'list':
-            stringout = _format_list(d, key, dset)
-        elif dset_type == 'array':
-            stringout = _format_numpy(key, dset)
-        elif dset_type == 'arraylist':
-            stringout = _format_arraylist(key, dset)
-        elif dset_type == 'tuple':
-            stringout = _format_tuple(d, key, dset)
-        elif dset_type == 'arraytuple':
-            stringout = _format_arraytuple(key, dset)
-        elif dset_type == 'string':
-            stringout = _format_str(key, dset)
-        elif dset_type == 'unicode':
-            stringout = _format_unicode(key, dset)
-        elif dset_type == 'scalar':
-            stringout = _format_scalar(key, dset)
-        elif dset_type == 'None':
-            stringout = _format_None(key, dset)
-        elif dset_type is None:
-            stringout = _format_numpy(key, dset)
-        else:
-            stringout = _format_unknown(key, dset)
-        return stringout
+        return _formatters.get(dset_type, _format_unknown)(d, key, dset)
 
     with h5py.File(filename, 'r') as f:
         # h5rw_version = f.attrs.get('h5rw_version',None)
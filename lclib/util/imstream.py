@@ -12,7 +12,18 @@ import numpy as np
 import logging
 import threading
 import time
+import importlib.util
 from . import Future
+from . import jsonenc
+
+logger = logging.getLogger(__name__)
+
+# Try to import blosc (optional frame compression)
+if importlib.util.find_spec('blosc') is not None:
+    import blosc
+else:
+    logger.debug("Module blosc unavailable on this host")
+    globals().update({'blosc': None})
 
 class FramePublisher:
     """
@@ -21,12 +32,21 @@ class FramePublisher:
     This object is meant to be short-lived: created when staring to publish, destroyed
     as soon as we're done.
 
+    Publishing never blocks the caller: frames are dropped if the previous one is
+    still being sent or if the zmq queue is full. See self.dropped.
+
     Argument:
       port: the port number on which to publish (the address will be tcp://*:port)
       arrays: if True, send numpy array. If false, raw byte strings.
+      compress: if True, numpy arrays are sent blosc-compressed (lz4 with bitshuffle).
+                Useful for remote subscribers. Decompression on the receiving end is
+                transparent.
     """
 
-    def __init__(self, port=5555, arrays=True):
+    # Send high-water mark (in message parts - each frame is header + data)
+    SNDHWM = 2
+
+    def __init__(self, port=5555, arrays=True, compress=False):
         """
         Initializes zmq socket for publishing data.
 
@@ -35,6 +55,10 @@ class FramePublisher:
         if arrays is True, publish numpy arrays. If false, publish raw byte buffers.
         """
         self.logger = logging.getLogger(self.__class__.__name__)
+        if compress and blosc is None:
+            self.logger.warning('blosc is not available: frames will be sent uncompressed.')
+            compress = False
+        self.compress = compress
         self.port = port
         self.address = f'tcp://*:{port}'
         self.logger.info(f'Publishing on {self.address}')
@@ -43,6 +67,9 @@ class FramePublisher:
         socketType = zmq.XPUB
         self.zmq_context = SerializingContext()
         self.zmq_socket = self.zmq_context.socket(socketType)
+        # Keep the outgoing queue short: slow subscribers get fewer frames
+        # instead of letting frames pile up. Must be set before bind.
+        self.zmq_socket.setsockopt(zmq.SNDHWM, self.SNDHWM)
         self.zmq_socket.bind(self.address)
         self.zmq_socket.setsockopt(zmq.XPUB_VERBOSE, True)
 
@@ -56,12 +83,19 @@ class FramePublisher:
         self._stop_poll = False
         self.poll_future = Future(self._poll)
 
-        # This will hold the Future object created by self.pub
-        self.pub_future = None
+        # Publishing is done on a single persistent thread. self.pub hands one frame
+        # at a time through self._pending, and _pub_event stays set until it is sent.
+        self._pending = None
+        self._pub_event = threading.Event()
+        self._stop_pub = False
+        self.pub_future = Future(self._pub_loop)
 
         # Cache of the latest published frame
         self.cache = None
 
+        # Number of frames dropped
+        self._dropped = 0
+
     def pub(self, data, metadata=None):
         """
         Publish frame and metadata.
@@ -70,19 +104,49 @@ class FramePublisher:
           metadata: any json-serializable object (probably dictionary).
         """
         self.cache = (data, metadata)
-        if not self.pub_future or self.pub_future.done():
-            self.pub_future = Future(self._pub, args=(data, metadata))
+        if not self._pub_event.is_set():
+            self._pending = (data, metadata)
+            self._pub_event.set()
         else:
-            self.logger.warning('Previous publish is not complete. Dropping one frame!')
+            self._dropped += 1
+            self.logger.debug('Previous publish is not complete. Dropping one frame!')
         return
-    
+
+    @property
+    def dropped(self):
+        """
+        Number of frames dropped since publishing started.
+        """
+        return self._dropped
+
+    def _pub_loop(self):
+        """
+        Wait for frames handed over by self.pub and publish them.
+        """
+        while not self._stop_pub:
+            self._pub_event.wait()
+            if self._stop_pub:
+                # Woken up by close
+                break
+            data, metadata = self._pending
+            self._pending = None
+            try:
+                self._pub(data, metadata)
+            except Exception:
+                self.logger.exception('Error while publishing frame.')
+            finally:
+                self._pub_event.clear()
+
     def _pub(self, data, metadata=None):
         """
         Do the actual publishing on a thread.
         """
         if not data.flags['C_CONTIGUOUS']:
             data = np.ascontiguousarray(data)
-        self.zmq_socket.send_frame(data, metadata, copy=False)
+        try:
+            self.zmq_socket.send_frame(data, metadata, flags=zmq.NOBLOCK, copy=False, compress=self.compress)
+        except zmq.Again:
+            self._dropped += 1
 
     def _poll(self):
         """
@@ -109,6 +173,10 @@ class FramePublisher:
         """
         self.logger.info('Shutting down broadcast')
         self._stop_poll = True
+        # Wake up the publishing thread and let it finish any ongoing send before closing the socket
+        self._stop_pub = True
+        self._pub_event.set()
+        self.pub_future.join()
         self.zmq_socket.close()
         self.zmq_context.term()
 
@@ -176,8 +244,8 @@ class FrameSubscriber:
             if (self.zmq_socket.poll(500.) & zmq.POLLIN) == 0:
                 continue
             try:
-                # New data has arrived
-                self._data = self.zmq_socket.recv_frame()
+                # New data has arrived. Arrays are built directly on the zmq message buffer.
+                self._data = self.zmq_socket.recv_frame(copy=False)
             except ValueError:
                 self.logger.warning('Something went wrong receiving frame data. Ignoring.')
                 continue
@@ -236,7 +304,7 @@ class SerializingSocket(zmq.Socket):
     Serialization of numpy arrays or raw buffers
     """
 
-    def send_frame(self, A, meta=None, flags=0, copy=True, track=False):
+    def send_frame(self, A, meta=None, flags=0, copy=True, track=False, compress=False):
         """
         Send a buffer or numpy array along with metadata.
 
@@ -246,6 +314,7 @@ class SerializingSocket(zmq.Socket):
           flags: (optional) zmq flags.
           copy: (optional) zmq copy flag.
           track: (optional) zmq track flag.
+          compress: (optional) if True, compress numpy arrays with blosc.
         """
 
         md = {'meta': meta}
@@ -255,14 +324,24 @@ class SerializingSocket(zmq.Socket):
             md['type'] = 'ndarray'
             md['dtype'] = str(A.dtype)
             md['shape'] = A.shape
+            if compress:
+                md['compression'] = 'blosc'
+                A = np.ascontiguousarray(A)
+                A = blosc.compress_ptr(A.__array_interface__['data'][0],
+                                       A.size,
+                                       typesize=A.itemsize,
+                                       clevel=3,
+                                       shuffle=blosc.BITSHUFFLE,
+                                       cname='lz4')
         else:
             md['type'] = 'bytes'
 
+        # The json header is small: always copied.
         if A is not None:
-            self.send_json(md, flags | zmq.SNDMORE)
+            self.send(jsonenc.dumpb(md), flags | zmq.SNDMORE)
             return self.send(A, flags, copy=copy, track=track)
         else:
-            return self.send_json(md, flags)
+            return self.send(jsonenc.dumpb(md), flags)
 
     def recv_frame(self, flags=0, copy=True, track=False):
         """
@@ -271,6 +350,9 @@ class SerializingSocket(zmq.Socket):
         If the buffer is that of a numpy array, the metadata
         necessary for reconstructing the array is also present.
 
+        With copy=False, numpy arrays are views on the
+        received message (no copy is made).
+
         Arguments:
           flags: (optional) zmq flags.
           copy: (optional) zmq copy flag.
@@ -281,13 +363,18 @@ class SerializingSocket(zmq.Socket):
           msg: metadata
         """
 
-        md = self.recv_json(flags=flags)
+        md = jsonenc.loads(self.recv(flags=flags))
         if md['type'] is None:
             return None, md['meta']
 
         A = self.recv(flags=flags, copy=copy, track=track)
+        if md.get('compression') == 'blosc':
+            A = blosc.decompress(A if copy else A.buffer)
+            copy = True
         if md['type'] == 'ndarray':
-            A = np.frombuffer(A, dtype=md['dtype']).reshape(md['shape'])
+            A = np.frombuffer(A if copy else A.buffer, dtype=md['dtype']).reshape(md['shape'])
+        elif not copy:
+            A = A.bytes
         return A, md['meta']
 
 
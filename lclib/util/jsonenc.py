@@ -0,0 +1,104 @@
+"""
+Fast json encoding, using orjson if available.
+
+Encoding supports numpy arrays and scalars. The output does not depend on
+whether orjson is installed:
+ * NaN and infinities are encoded as null (standard json has no
+   representation for them), so they are read back as None.
+ * Objects that cannot be serialized are silently converted to strings
+   (str(obj)) instead of raising TypeError. This is meant for metadata and
+   logging, where an odd value must not stop an acquisition. Use the json
+   module directly where unsupported types must be rejected (e.g. FileDict).
+
+This file is part of lab-control-lib
+(c) 2023-2024 Pierre Thibault (pthibault@units.it)
+"""
+
+import json
+import math
+import logging
+import importlib.util
+import numpy as np
+
+__all__ = ['dumps', 'dumpb', 'loads']
+
+logger = logging.getLogger(__name__)
+
+# Try to import orjson
+if importlib.util.find_spec('orjson') is not None:
+    import orjson
+else:
+    logger.debug("Module orjson unavailable on this host")
+    globals().update({'orjson': None})
+
+
+def _default(obj):
+    """
+    Fallback for objects that are not natively serializable.
+    """
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return str(obj)
+
+
+def _finite(obj):
+    """
+    Copy of obj with non-finite floats replaced by None, as orjson encodes them.
+    """
+    if isinstance(obj, (float, np.floating)):
+        return float(obj) if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        return _finite(obj.tolist())
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj) -> str:
+        """
+        Encode obj to a json string.
+        """
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS).decode()
+
+    def dumpb(obj) -> bytes:
+        """
+        Encode obj to json bytes.
+        """
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+
+    def loads(s):
+        """
+        Decode json string or bytes. NaN and Infinity (written by older versions
+        with the json module) are accepted.
+        """
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            return json.loads(s)
+else:
+    def dumps(obj) -> str:
+        """
+        Encode obj to a json string.
+        """
+        try:
+            return json.dumps(obj, default=_default, allow_nan=False)
+        except ValueError:
+            # Non-finite floats: encode them as null, like orjson
+            return json.dumps(_finite(obj), default=_default, allow_nan=False)
+
+    def dumpb(obj) -> bytes:
+        """
+        Encode obj to json bytes.
+        """
+        return dumps(obj).encode()
+
+    loads = json.loads
@@ -0,0 +1,178 @@
+"""
+Round-trip tests for the HDF5 frame writer and its metadata layouts.
+"""
+
+import os
+import numpy as np
+import h5py
+import pytest
+
+from lclib.util import h5read, h5write
+from lclib.util.frameconsumer.frameconsumer import HDF5Worker, split_meta, merge_meta, load_meta
+
+
+def frames(n=5, shape=(16, 12), dtype=np.uint16):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 4000, size=shape).astype(dtype) for _ in range(n)]
+
+
+def metas(n=5):
+    return [{'exposure_time': 0.1,
+             'counter': i,
+             'motors': {'x': 1.5, 'y': float(i)},
+             'camera': {'name': 'cam', 'temperature': -20.}} for i in range(n)]
+
+
+def write(filename, data, meta, **kwargs):
+    """
+    Write frames with HDF5Worker and wait for the file to be closed.
+    """
+    worker = HDF5Worker(filename, n_frames=len(data), **kwargs)
+    for d, m in zip(data, meta):
+        worker.new_data((d, m))
+    worker.close()
+    assert worker.future.exception(timeout=20) is None
+    assert worker.done()
+
+
+def test_split_merge_meta():
+    m = metas()
+    common, deltas = split_meta(m)
+    assert common['exposure_time'] == 0.1
+    assert common['camera'] == {'name': 'cam', 'temperature': -20.}
+    assert common['motors'] == {'x': 1.5}
+    assert deltas[3] == {'counter': 3, 'motors': {'y': 3.}}
+    assert [merge_meta(common, d) for d in deltas] == m
+
+
+def test_split_meta_missing_keys():
+    m = [{'a': 1, 'b': 2}, {'a': 1}, {'a': 1, 'c': {'d': 3}}]
+    common, deltas = split_meta(m)
+    assert common == {'a': 1}
+    assert [merge_meta(common, d) for d in deltas] == m
+    assert split_meta([]) == ({}, [])
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip', 'lzf'])
+def test_compression(tmp_path, compression):
+    fn = str(tmp_path / 'frames.h5')
+    data, meta = frames(), metas()
+    write(fn, data, meta, compression=compression)
+    with h5py.File(fn, 'r') as f:
+        assert f['data'].compression == compression
+        assert f.attrs['format_version'] >= 1
+        np.testing.assert_array_equal(f['data'][()], np.array(data))
+
+
+def test_default_layout(tmp_path):
+    fn = str(tmp_path / 'frames.h5')
+    data, meta = frames(), metas()
+    write(fn, data, meta)
+    with h5py.File(fn, 'r') as f:
+        assert f['data'].compression == 'gzip'
+    # Readable with h5read, as files written with h5write
+    d = h5read(fn)
+    np.testing.assert_array_equal(d['data'], np.array(data))
+    assert d['meta'] == meta
+    assert load_meta(fn) == meta
+
+
+def test_blosc(tmp_path):
+    pytest.importorskip('hdf5plugin')
+    fn = str(tmp_path / 'frames.h5')
+    data, meta = frames(), metas()
+    write(fn, data, meta, compression='blosc', shuffle='bit')
+    with h5py.File(fn, 'r') as f:
+        np.testing.assert_array_equal(f['data'][()], np.array(data))
+
+
+def test_direct_chunk_write(tmp_path):
+    pytest.importorskip('blosc')
+    pytest.importorskip('hdf5plugin')
+    fn = str(tmp_path / 'frames.h5')
+    data, meta = frames(), metas()
+    write(fn, data, meta, direct_chunk_write=True)
+    with h5py.File(fn, 'r') as f:
+        np.testing.assert_array_equal(f['data'][()], np.array(data))
+    assert load_meta(fn) == meta
+
+
+def test_more_frames_than_expected(tmp_path):
+    fn = str(tmp_path / 'frames.h5')
+    data, meta = frames(7), metas(7)
+    worker = HDF5Worker(fn, n_frames=3)
+    for d, m in zip(data, meta):
+        worker.new_data((d, m))
+    worker.close()
+    assert worker.future.exception(timeout=20) is None
+    with h5py.File(fn, 'r') as f:
+        np.testing.assert_array_equal(f['data'][()], np.array(data))
+
+
+def test_fewer_frames_than_expected(tmp_path):
+    fn = str(tmp_path / 'frames.h5')
+    data, meta = frames(2), metas(2)
+    worker = HDF5Worker(fn, n_frames=10)
+    for d, m in zip(data, meta):
+        worker.new_data((d, m))
+    worker.close()
+    assert worker.future.exception(timeout=20) is None
+    with h5py.File(fn, 'r') as f:
+        assert f['data'].shape == (2, 16, 12)
+    assert load_meta(fn) == meta
+
+
+def test_quantize(tmp_path):
+    fn = str(tmp_path / 'frames.h5')
+    data, meta = frames(), metas()
+    write(fn, data, meta, quantize_bits=8, quantize_shift=2, quantize_offset=100)
+    expected = np.clip((np.array(data).astype(np.int64) - 100) >> 2, 0, 255)
+    with h5py.File(fn, 'r') as f:
+        dset = f['data']
+        assert dset.dtype == np.uint8
+        assert dset.attrs['quantize_bits'] == 8
+        assert dset.attrs['quantize_shift'] == 2
+        assert dset.attrs['quantize_offset'] == 100
+        np.testing.assert_array_equal(dset[()], expected)
+
+
+def test_core_driver(tmp_path):
+    fn = str(tmp_path / 'frames.h5')
+    data, meta = frames(), metas()
+    write(fn, data, meta, core_driver=True)
+    with h5py.File(fn, 'r') as f:
+        np.testing.assert_array_equal(f['data'][()], np.array(data))
+    assert load_meta(fn) == meta
+
+
+@pytest.mark.parametrize('metadata_format', ['h5', 'json', 'json-split'])
+@pytest.mark.parametrize('metadata_sidecar', [False, True])
+def test_metadata_layouts(tmp_path, metadata_format, metadata_sidecar):
+    fn = str(tmp_path / 'frames.h5')
+    data, meta = frames(), metas()
+    meta[2]['motors']['z'] = np.float32(2.5)
+    meta[4]['array'] = np.arange(3)
+    write(fn, data, meta, metadata_format=metadata_format, metadata_sidecar=metadata_sidecar)
+
+    meta[2]['motors']['z'] = 2.5
+    meta[4]['array'] = [0, 1, 2]
+    loaded = load_meta(fn)
+    loaded[4]['array'] = list(loaded[4]['array'])
+    assert loaded == meta
+
+    assert os.path.exists(fn + '.json') == metadata_sidecar
+    with h5py.File(fn, 'r') as f:
+        if metadata_format == 'h5' and not metadata_sidecar:
+            assert f.attrs['meta_format'] == 'h5'
+            assert 'meta' in f
+        else:
+            assert f.attrs['meta_format'] in ('json', 'json-split')
+            assert 'meta' not in f
+
+
+def test_load_meta_legacy(tmp_path):
+    # Files written with h5write before the metadata format attributes existed
+    fn = str(tmp_path / 'frames.h5')
+    data, meta = frames(), metas()
+    h5write(fn, meta=meta, data=np.array(data))
+    assert load_meta(fn) == meta
@@ -0,0 +1,31 @@
+"""
+Tests for the json encoding helpers.
+"""
+
+import math
+import numpy as np
+
+from lclib.util import jsonenc
+
+
+def test_numpy():
+    d = {'a': np.float32(1.5), 'b': np.arange(3), 'c': np.int64(2)}
+    assert jsonenc.loads(jsonenc.dumpb(d)) == {'a': 1.5, 'b': [0, 1, 2], 'c': 2}
+    assert jsonenc.loads(jsonenc.dumps(d)) == {'a': 1.5, 'b': [0, 1, 2], 'c': 2}
+
+
+def test_non_finite():
+    # Same policy with and without orjson: non-finite floats become null
+    d = {'a': float('nan'), 'b': [1., float('inf')], 'c': np.array([np.nan, 2.])}
+    assert jsonenc.loads(jsonenc.dumps(d)) == {'a': None, 'b': [1., None], 'c': [None, 2.]}
+
+
+def test_loads_nan():
+    assert math.isnan(jsonenc.loads(b'{"a": NaN}')['a'])
+
+
+def test_unknown_type():
+    class A:
+        def __str__(self):
+            return 'an A'
+    assert jsonenc.loads(jsonenc.dumps({'a': A()})) == {'a': 'an A'}